@@ -4,7 +4,8 @@ Testy dla warstw wykonawczych (text2make, text2shell, text2git, etc.)
 
 import pytest
 from pathlib import Path
-import tempfile
+import subprocess
+import shutil
 import os
 
 
@@ -38,6 +39,10 @@ class TestText2Shell:
         bash = self.shell.translate_to_bash("pokaż pliki")
         assert "ls" in bash
 
+    def test_translate_keeps_argument_case(self):
+        """Test że argumenty zostają w oryginalnej postaci (bez casefold)"""
+        assert self.shell.translate_to_bash("Pokaż plik Straße.TXT") == "cat Straße.TXT"
+
     def test_translate_english_command(self):
         """Test tłumaczenia angielskiego polecenia"""
         bash = self.shell.translate_to_bash("show files")
@@ -50,6 +55,39 @@ class TestText2Shell:
         assert not result.success
         assert "zablokowana" in result.error.lower()
 
+    def test_missing_program_and_working_dir(self, tmp_path):
+        """Test rozróżnienia brakującego programu i brakującego katalogu roboczego"""
+        from text2dsl.layers.text2shell import Text2Shell
+
+        result = self.shell.run("nie-ma-takiego-programu-xyz")
+        assert result.return_code == 127
+
+        missing = tmp_path / "usuniety"
+        missing.mkdir()
+        shell = Text2Shell(str(missing))
+        missing.rmdir()
+        result = shell.run("ls")
+        assert result.return_code == -1
+        assert "Katalog roboczy nie istnieje" in result.error
+
+    def test_shell_builtins(self):
+        """Test wbudowanych poleceń powłoki spoza listy _SHELL_BUILTINS"""
+        for command in ("command -v ls", "type ls"):
+            result = self.shell.run(command)
+            assert result.success, command
+            assert "ls" in result.output
+
+    def test_not_executable_file(self, tmp_path):
+        """Test pliku bez prawa wykonania (kod 126 jak w powłoce)"""
+        from text2dsl.layers.text2shell import Text2Shell
+
+        script = tmp_path / "skrypt.sh"
+        script.write_text("#!/bin/sh\necho hej\n")
+        script.chmod(0o644)
+
+        result = Text2Shell(str(tmp_path)).run("./skrypt.sh")
+        assert result.return_code == 126
+
     def test_cd(self):
         """Test zmiany katalogu"""
         original = self.shell.pwd()
@@ -79,20 +117,36 @@ class TestText2Shell:
         assert history[0].command == "echo 1"
         assert history[1].command == "echo 2"
 
+        # n=0 zwraca całą historię (jak wycinek [-0:])
+        assert len(self.shell.get_history(0)) == 2
+
     def test_get_suggestions(self):
         """Test sugestii"""
         suggestions = self.shell.get_suggestions()
         assert len(suggestions) > 0
 
 
+def test_layer_import_is_lazy():
+    """Test że import jednej warstwy nie ładuje pozostałych ani warstwy głosowej"""
+    import sys
+
+    code = (
+        "import sys, text2dsl; text2dsl.Text2Make; "
+        "print(sorted(m for m in sys.modules if m.startswith('text2dsl.layers.')))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.stdout.strip() == "['text2dsl.layers.text2make']"
+
+
 class TestText2Make:
     """Testy dla Text2Make"""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def make_env(self, tmp_path):
         from text2dsl.layers.text2make import Text2Make
 
         # Utwórz tymczasowy katalog z Makefile
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = str(tmp_path)
         self.makefile_path = Path(self.temp_dir) / "Makefile"
         self.makefile_path.write_text(
             """
@@ -117,10 +171,20 @@ clean:
 
         self.make = Text2Make(self.temp_dir)
 
-    def teardown_method(self):
-        import shutil
+    def _count_makefile_opens(self, monkeypatch):
+        """Zlicza otwarcia Makefile przez open() w procesie testów"""
+        import builtins
+
+        opens = []
+        real_open = builtins.open
+
+        def counting_open(file, *args, **kwargs):
+            if isinstance(file, (str, os.PathLike)) and Path(file) == self.makefile_path:
+                opens.append(file)
+            return real_open(file, *args, **kwargs)
 
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        monkeypatch.setattr(builtins, "open", counting_open)
+        return opens
 
     def test_has_makefile(self):
         """Test wykrywania Makefile"""
@@ -136,6 +200,66 @@ clean:
         assert "test" in target_names
         assert "clean" in target_names
 
+    def test_targets_refresh_after_edit(self):
+        """Test ponownego parsowania po zmianie Makefile"""
+        self.makefile_path.write_text(self.makefile_path.read_text() + "\nlint:\n\t@echo lint\n")
+
+        target_names = [t.name for t in self.make.get_targets()]
+        assert "lint" in target_names
+
+    def test_dependency_tree_refresh_after_edit(self):
+        """Test że drzewo zależności widzi zmiany Makefile"""
+        self.make.get_targets()
+        self.makefile_path.write_text(
+            self.makefile_path.read_text() + "\nrelease: build\n\t@echo release\n"
+        )
+
+        assert "release" in self.make.get_dependency_tree("release")
+
+    def test_targets_cleared_after_makefile_removed(self):
+        """Test że po usunięciu Makefile nie zostają cele ze starego parsowania"""
+        assert self.make.get_targets()
+        self.makefile_path.unlink()
+
+        assert self.make.get_targets() == []
+        assert self.make.get_dependency_tree("build") == {}
+
+    def test_new_instance_reuses_parse(self, monkeypatch):
+        """Test że nowa instancja nie parsuje niezmienionego Makefile ponownie"""
+        from text2dsl.layers.text2make import Text2Make
+
+        self.make.get_targets()
+        opens = self._count_makefile_opens(monkeypatch)
+        other = Text2Make(self.temp_dir)
+        assert other.get_target("build") is not None
+        assert opens == []
+
+    def test_parse_deferred_until_targets_used(self, monkeypatch):
+        """Test że konstruktor i run() nie parsują Makefile"""
+        from text2dsl.layers.text2make import Text2Make
+
+        opens = self._count_makefile_opens(monkeypatch)
+        make = Text2Make(self.temp_dir)
+        assert make.has_makefile()
+        assert make.run("build").success
+        assert opens == []
+
+        assert "build" in make.targets
+        assert len(opens) == 1
+
+    def test_dependency_tree_deep_chain(self):
+        """Test drzewa zależności dla łańcucha głębszego niż limit rekurencji"""
+        from text2dsl.layers.text2make import Text2Make
+
+        depth = 2000
+        rules = "".join(f"t{i}: t{i + 1}\n" for i in range(depth))
+        self.makefile_path.write_text(rules + f"t{depth}:\n\t@echo done\n")
+
+        tree = Text2Make(self.temp_dir).get_dependency_tree("t0")
+        assert len(tree) == depth + 1
+        assert list(tree)[:3] == ["t0", "t1", "t2"]
+        assert tree[f"t{depth}"] == []
+
     def test_run_target(self):
         """Test wykonania celu"""
         result = self.make.run("build")
@@ -165,34 +289,49 @@ clean:
         result = self.make.run("build", dry_run=True)
         assert result.success
 
+    def test_generate_makefile(self):
+        """Test generowania Makefile z szablonu"""
+        from text2dsl.layers.text2make import MakefileGenerator, generate_makefile
+
+        assert "pytest" in generate_makefile("python")
+        assert generate_makefile("nieznany") == generate_makefile("basic")
+        assert MakefileGenerator.generate("docker") == generate_makefile("docker")
+        with pytest.raises(TypeError):
+            MakefileGenerator.TEMPLATES["basic"] = ""
+
+
+@pytest.fixture(scope="session")
+def git_template(tmp_path_factory):
+    """Repozytorium Git z początkowym commitem - tworzone raz na sesję"""
+    repo = tmp_path_factory.mktemp("git_template")
+    Path(repo, "README.md").write_text("# Test")
+    subprocess.run(
+        [
+            "sh",
+            "-c",
+            "git init -q && git config user.email 'test@test.com' && "
+            "git config user.name 'Test' && git add . && git commit -q -m 'Initial commit'",
+        ],
+        cwd=repo,
+        check=True,
+    )
+    return repo
+
 
 class TestText2Git:
     """Testy dla Text2Git"""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def git_repo(self, git_template, tmp_path):
         from text2dsl.layers.text2git import Text2Git
 
-        # Utwórz tymczasowe repo git
-        self._original_cwd = os.getcwd()
-        self.temp_dir = tempfile.mkdtemp()
-        os.chdir(self.temp_dir)
-        os.system("git init")
-        os.system("git config user.email 'test@test.com'")
-        os.system("git config user.name 'Test'")
-
-        # Utwórz początkowy plik i commit
-        Path(self.temp_dir, "README.md").write_text("# Test")
-        os.system("git add .")
-        os.system("git commit -m 'Initial commit'")
+        # Kopia szablonu zamiast git init/config/commit w każdym teście
+        repo = tmp_path / "repo"
+        shutil.copytree(git_template, repo)
+        self.temp_dir = str(repo)
 
         self.git = Text2Git(self.temp_dir)
 
-    def teardown_method(self):
-        import shutil
-
-        os.chdir(self._original_cwd)
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
     def test_is_repo(self):
         """Test wykrywania repo"""
         assert self.git.is_repo()
@@ -203,6 +342,74 @@ class TestText2Git:
         assert status is not None
         assert status.branch is not None
 
+    def test_get_status_porcelain_v2(self):
+        """Test parsowania nagłówków i wpisów 'git status --porcelain=v2'"""
+        from text2dsl.layers.text2git import GitResult
+
+        output = "\n".join(
+            [
+                "# branch.oid 0123abcd",
+                "# branch.head feature/x",
+                "# branch.upstream origin/feature/x",
+                "# branch.ab +2 -3",
+                "1 M. N... 100644 100644 100644 aaa bbb staged.py",
+                "1 .M N... 100644 100644 100644 aaa aaa modified file.py",
+                "2 R. N... 100644 100644 100644 aaa aaa R100 new.py\told.py",
+                "? new dir/notes.txt",
+            ]
+        )
+        status = self.git._parse_status(GitResult(True, output, "", "status"))
+        assert status.branch == "feature/x"
+        assert (status.ahead, status.behind) == (2, 3)
+        assert status.staged == ["staged.py", "new.py"]
+        assert status.modified == ["modified file.py"]
+        assert status.untracked == ["new dir/notes.txt"]
+
+        detached = self.git._parse_status(GitResult(True, "# branch.head (detached)", "", "status"))
+        assert detached.branch == ""
+
+    def test_get_status_branch_matches_git(self):
+        """Test że gałąź ze statusu zgadza się z 'git branch --show-current'"""
+        current = subprocess.run(
+            ["git", "branch", "--show-current"], cwd=self.temp_dir, capture_output=True, text=True
+        ).stdout.strip()
+        assert self.git.get_status().branch == current
+
+    def test_get_status_cached_until_change(self, monkeypatch):
+        """Test że status jest zapamiętywany do operacji zmieniającej repozytorium"""
+        first = self.git.get_status()
+        calls = []
+        run = subprocess.run
+
+        def counting_run(*args, **kwargs):
+            calls.append(args)
+            return run(*args, **kwargs)
+
+        monkeypatch.setattr(subprocess, "run", counting_run)
+
+        assert self.git.get_status() is first
+        assert calls == []
+
+        Path(self.temp_dir, "new_file.txt").write_text("content")
+        self.git.add("new_file.txt")
+        assert "new_file.txt" in self.git.get_status().staged
+
+    def test_get_status_async(self):
+        """Test asynchronicznego pobierania statusu"""
+        import asyncio
+
+        status = asyncio.run(self.git.get_status_async())
+        assert status == self.git.get_status()
+
+    def test_get_overview_async(self):
+        """Test równoległego pobierania statusu, gałęzi i historii"""
+        import asyncio
+
+        status, branches, commits = asyncio.run(self.git.get_overview_async(5))
+        assert status == self.git.get_status()
+        assert branches == self.git.get_branches()
+        assert commits == self.git.get_log(5)
+
     def test_get_branches(self):
         """Test pobierania gałęzi"""
         branches = self.git.get_branches()
@@ -231,6 +438,11 @@ class TestText2Git:
         status = self.git.get_status()
         assert "new_file.txt" in status.staged
 
+    def test_natural_key_longest_prefix(self):
+        """Test wyboru najdłuższego pasującego polecenia"""
+        assert self.git._match_natural_key("dodaj wszystko") == "dodaj wszystko"
+        assert self.git._match_natural_key("dodaj plik.txt") == "dodaj"
+
     def test_execute_natural_status(self):
         """Test naturalnego polecenia status"""
         result = self.git.execute_natural("status")
@@ -241,6 +453,12 @@ class TestText2Git:
         result = self.git.execute_natural("wypchnij zmiany")
         assert result.operation == "push"
 
+    def test_execute_natural_keeps_branch_case(self):
+        """Test że nazwa gałęzi nie jest zmieniana przez casefold"""
+        result = self.git.execute_natural("Utwórz gałąź Straße")
+        assert result.success
+        assert "Straße" in self.git.get_branches()
+
     def test_get_suggestions(self):
         """Test sugestii"""
         suggestions = self.git.get_suggestions()
@@ -250,10 +468,11 @@ class TestText2Git:
 class TestText2Docker:
     """Testy dla Text2Docker (bez uruchamiania Dockera)"""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def docker_env(self, tmp_path):
         from text2dsl.layers.text2docker import Text2Docker
 
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = str(tmp_path)
 
         # Utwórz Dockerfile
         Path(self.temp_dir, "Dockerfile").write_text(
@@ -281,11 +500,6 @@ services:
 
         self.docker = Text2Docker(self.temp_dir)
 
-    def teardown_method(self):
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
     def test_has_dockerfile(self):
         """Test wykrywania Dockerfile"""
         assert self.docker.has_dockerfile()
@@ -305,14 +519,58 @@ services:
         suggestions = self.docker.get_suggestions()
         assert len(suggestions) > 0
 
+    def test_natural_key_longest_prefix(self):
+        """Test wyboru najdłuższego pasującego polecenia"""
+        assert self.docker._match_natural_key("uruchom serwisy") == "uruchom serwisy"
+        assert self.docker._match_natural_key("uruchom nginx") == "uruchom"
+        assert self.docker._match_natural_key("uruchomienie") is None
+
+    def test_has_docker_cached(self, monkeypatch):
+        """Test że dostępność Dockera jest sprawdzana raz"""
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            return subprocess.CompletedProcess(cmd, 0, stdout="24.0.7\n", stderr="")
+
+        monkeypatch.setattr(subprocess, "run", fake_run)
+
+        assert self.docker.has_docker(refresh=True)
+        assert type(self.docker)(self.temp_dir).has_docker()
+        assert len(calls) == 1
+
+        # Przywróć prawdziwy wynik dla kolejnych testów
+        monkeypatch.undo()
+        self.docker.has_docker(refresh=True)
+
+    def test_get_containers_cached(self, monkeypatch):
+        """Test że lista kontenerów jest zapamiętywana do zmiany stanu"""
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            output = "abc123\tweb\tapp\tUp 2 minutes\t80/tcp\t2024-01-01\n"
+            return subprocess.CompletedProcess(cmd, 0, stdout=output, stderr="")
+
+        monkeypatch.setattr(subprocess, "run", fake_run)
+
+        assert self.docker.get_containers()[0].name == "web"
+        assert self.docker.get_containers()[0].running
+        assert len(calls) == 1
+
+        self.docker.stop("web")
+        self.docker.get_containers()
+        assert len(calls) == 3
+
 
 class TestText2Python:
     """Testy dla Text2Python"""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def python_env(self, tmp_path):
         from text2dsl.layers.text2python import Text2Python
 
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = str(tmp_path)
 
         # Utwórz requirements.txt
         Path(self.temp_dir, "requirements.txt").write_text("pytest\nblack\n")
@@ -322,11 +580,6 @@ class TestText2Python:
 
         self.python = Text2Python(self.temp_dir)
 
-    def teardown_method(self):
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
     def test_get_python_version(self):
         """Test pobierania wersji Python"""
         version = self.python.get_python_version()
@@ -359,10 +612,11 @@ class TestText2Python:
 class TestContextManager:
     """Testy dla ContextManager"""
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def context_env(self, tmp_path):
         from text2dsl.core.context_manager import ContextManager
 
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = str(tmp_path)
 
         # Utwórz strukturę projektu
         Path(self.temp_dir, "Makefile").write_text(".PHONY: all\nall:\n\t@echo ok")
@@ -371,17 +625,60 @@ class TestContextManager:
 
         self.context = ContextManager(self.temp_dir)
 
-    def teardown_method(self):
-        import shutil
-
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-
     def test_project_detected(self):
         """Test wykrywania projektu"""
         assert self.context.project is not None
         assert self.context.project.has_makefile
         assert self.context.project.has_git
 
+    def test_refresh_detects_new_files(self):
+        """Test że cache listingu katalogu jest unieważniany po zmianie katalogu"""
+        assert not self.context.project.has_dockerfile
+
+        Path(self.temp_dir, "Dockerfile").write_text("FROM python:3.9-slim")
+        self.context.refresh_project_context()
+        assert self.context.project.has_dockerfile
+
+    def test_refresh_reuses_cached_context(self):
+        """Test że niezmieniony katalog nie jest ponownie wykrywany, a edycja Makefile tak"""
+        project = self.context.project
+        self.context.refresh_project_context()
+        assert self.context.project is project
+
+        makefile = Path(self.temp_dir, "Makefile")
+        makefile.write_text(".PHONY: all test\nall:\n\t@echo ok\ntest:\n\t@echo test")
+        mtime_ns = makefile.stat().st_mtime_ns + 1_000_000
+        os.utime(makefile, ns=(mtime_ns, mtime_ns))
+        self.context.refresh_project_context()
+        assert "test" in self.context.project.makefile_targets
+
+    def test_compose_services_detected(self):
+        """Test wykrywania serwisów docker-compose bez PyYAML"""
+        Path(self.temp_dir, "docker-compose.yml").write_text(
+            "services:\n  web:\n    image: nginx\n    environment:\n      FOO: bar\n"
+            "  db:\n    image: postgres\nvolumes:\n  data:\n"
+        )
+        self.context.refresh_project_context()
+        assert self.context.project.docker_services == ["web", "db"]
+
+    def test_new_instance_reuses_scan(self):
+        """Test że kolejna instancja w tym samym katalogu nie skanuje go ponownie"""
+        from text2dsl.core.context_manager import ContextManager
+
+        assert ContextManager(self.temp_dir).project is self.context.project
+
+    def test_venv_detected_next_to_env_file(self):
+        """Test wykrywania venv gdy .env jest plikiem dotenv, a nie katalogiem"""
+        Path(self.temp_dir, ".env").write_text("FOO=bar\n")
+        self.context.refresh_project_context()
+        assert self.context.project.python_venv is None
+
+        venv_bin = Path(self.temp_dir, ".venv", "bin")
+        venv_bin.mkdir(parents=True)
+        (venv_bin / "python").write_text("")
+        self.context.refresh_project_context()
+        assert self.context.project.python_venv == str(Path(self.temp_dir, ".venv").resolve())
+
     def test_get_contextual_options(self):
         """Test opcji kontekstowych"""
         options = self.context.get_contextual_options()
@@ -395,6 +692,20 @@ class TestContextManager:
         assert self.context.state.last_target == "build"
         assert self.context.state.command_count == 1
 
+    def test_conversation_state_last_activity(self):
+        """Test przypisania last_activity i zachowania go przez replace()"""
+        from dataclasses import replace
+        from datetime import datetime, timedelta
+        from text2dsl.core.context_manager import ConversationState
+
+        start = datetime(2024, 1, 1, 12, 0)
+        state = ConversationState(started_at=start)
+        assert state.last_activity - start < timedelta(seconds=1)
+
+        state.last_activity = start + timedelta(minutes=1)
+        assert state.last_activity == start + timedelta(minutes=1)
+        assert replace(state, command_count=3).last_activity == start + timedelta(minutes=1)
+
     def test_change_directory(self):
         """Test zmiany katalogu"""
         original = self.context.working_dir
@@ -408,18 +719,25 @@ class TestContextManager:
 
 
 class TestOrchestratorSuggestionSelection:
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def orchestrator_env(self, tmp_path):
         from text2dsl.orchestrator import Text2DSLOrchestrator, OrchestratorConfig
 
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = str(tmp_path)
         self.orchestrator = Text2DSLOrchestrator(
             OrchestratorConfig(working_dir=self.temp_dir, voice_enabled=False, verbose=False)
         )
 
-    def teardown_method(self):
-        import shutil
+    def test_probe_layers_async(self):
+        import asyncio
 
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        assert asyncio.run(self.orchestrator.probe_layers_async()) == {}
+
+        Path(self.temp_dir, "requirements.txt").write_text("")
+        self.orchestrator.context.refresh_project_context()
+        probes = asyncio.run(self.orchestrator.probe_layers_async())
+        assert list(probes) == ["python_version"]
+        assert "python" in probes["python_version"].lower()
 
     def test_select_suggestion_by_number(self):
         from text2dsl.core.suggestion_engine import Suggestion
@@ -446,5 +764,36 @@ class TestOrchestratorSuggestionSelection:
         assert self.orchestrator._select_suggestion("[s]", suggestions) == suggestions[0]
 
 
+class TestSuggestionEngine:
+    """Testy dla SuggestionEngine"""
+
+    def setup_method(self):
+        from text2dsl.core.suggestion_engine import SuggestionEngine
+
+        self.engine = SuggestionEngine()
+
+    def test_get_completion(self):
+        assert self.engine.get_completion("ZBU") == "zbuduj projekt"
+        assert self.engine.get_completion("docker c") == "docker compose up -d"
+        assert self.engine.get_completion("xyz") is None
+
+    def test_get_completion_prefers_frequent_commands(self):
+        self.engine.record_command("zbuduj wszystko")
+        assert self.engine.get_completion("zbu") == "zbuduj wszystko"
+
+    def test_filter_does_not_change_shared_scores(self):
+        context = {"project": {"has_makefile": True}}
+        first = self.engine.get_suggestions("zbuduj", context)
+        second = self.engine.get_suggestions("zbuduj", context)
+        assert first[0].score == second[0].score
+        assert self.engine.CONTEXT_SUGGESTIONS["makefile"][0].score == 0.9
+
+    def test_error_suggestions_boosted(self):
+        result = {"success": False, "error": "Merge conflict in app.py"}
+        suggestions = self.engine.get_suggestions(last_result=result)
+        assert suggestions[0].command == "git diff --name-only --diff-filter=U"
+        assert suggestions[0].score == pytest.approx(1.1)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -105,6 +105,12 @@ class TestDSLParser:
         assert result.action == "build"
         assert result.target == "myapp"
 
+    def test_parse_target_keeps_case(self):
+        """Test że cel pochodzi z oryginalnego tekstu (bez casefold)"""
+        result = self.parser.parse("Uruchom kontener Straße")
+        assert result.type == CommandType.DOCKER
+        assert result.target == "Straße"
+
     def test_parse_docker_compose(self):
         """Test parsowania 'compose up'"""
         result = self.parser.parse("compose up")
@@ -206,6 +212,39 @@ class TestDSLParser:
         result = self.parser.parse("zbuduj!")
         assert result.type == CommandType.MAKE
 
+    def test_cached_parse_keeps_raw_input(self):
+        """Test że cache parsowania zwraca niezależne kopie z oryginalnym wejściem"""
+        result1 = self.parser.parse("ZBUDUJ!")
+        result2 = self.parser.parse("zbuduj")
+        assert result1 is not result2
+        assert result1.raw_input == "ZBUDUJ!"
+        assert result2.raw_input == "zbuduj"
+        assert result1.action == result2.action
+
+    def test_auto_detect_keeps_parser_language(self):
+        """Test że wykryty język dotyczy tylko jednego wywołania"""
+        result = self.parser.parse("build the project", auto_detect_lang=True)
+        assert result.type == CommandType.MAKE
+        assert self.parser.language == "pl"
+
+    # ==================== Keyword Inference ====================
+
+    def test_infer_counts_each_keyword_once(self):
+        """Test że powtórzone słowo kluczowe liczy się raz"""
+        result = self.parser._infer_from_keywords("git git git docker obraz", "", "pl")
+        assert result.type == CommandType.DOCKER
+
+    def test_infer_tie_prefers_earlier_type(self):
+        """Test rozstrzygania remisu kolejnością typów, nie kolejnością słów"""
+        assert self.parser._infer_from_keywords("git docker", "", "pl").type == CommandType.GIT
+        assert self.parser._infer_from_keywords("docker git", "", "pl").type == CommandType.GIT
+
+    def test_infer_overlapping_phrases(self):
+        """Test że fraza wielowyrazowa nie zabiera słów innym frazom"""
+        # DOCKER: "uruchom kontener" + "kontener", SHELL: "uruchom", MAKE: "make"
+        result = self.parser._infer_from_keywords("uruchom kontener make", "", "pl")
+        assert result.type == CommandType.DOCKER
+
     # ==================== Suggestions ====================
 
     def test_get_suggestions_empty(self):
@@ -222,6 +261,16 @@ class TestDSLParser:
         suggestions = self.parser.get_suggestions("z")
         assert any("zbuduj" in s for s in suggestions)
 
+    def test_get_suggestions_multiword_keyword(self):
+        """Test sugestii dla fraz wielowyrazowych"""
+        suggestions = self.parser.get_suggestions("uruchom k")
+        assert "uruchom kontener" in suggestions
+
+    def test_get_suggestions_keyword_order(self):
+        """Test że sugestie zachowują kolejność słów kluczowych"""
+        expected = ["polecenie", "push", "pull", "pobierz", "python"]
+        assert self.parser.get_suggestions("p") == expected
+
     # ==================== History ====================
 
     def test_command_history(self):
@@ -233,6 +282,13 @@ class TestDSLParser:
         assert len(self.parser.command_history) == 3
         assert self.parser.last_command.action == "push"
 
+    def test_command_history_limit(self):
+        """Test ograniczenia długości historii"""
+        for _ in range(60):
+            self.parser.parse("zbuduj")
+
+        assert len(self.parser.command_history) == 50
+
 
 class TestParsedCommand:
     """Testy struktury ParsedCommand"""
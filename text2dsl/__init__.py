@@ -10,28 +10,58 @@ Architektura warstw:
 __version__ = "0.2.0"
 __author__ = "Softreck"
 
-from .core.dsl_parser import DSLParser
-from .core.context_manager import ContextManager
-from .core.suggestion_engine import SuggestionEngine
-
-from .layers.voice_layer import (
-    VoiceLayer,
-    VoiceConfig,
-    VoiceBackend,
-    Language,
-    LanguageConfig,
-    LANGUAGE_CONFIGS,
-    get_language_config,
-)
-from .layers.text2make import Text2Make
-from .layers.text2shell import Text2Shell
-from .layers.text2git import Text2Git
-from .layers.text2docker import Text2Docker
-from .layers.text2python import Text2Python
-
-from .orchestrator import Text2DSLOrchestrator, OrchestratorConfig, ExecutionResponse
-
-from .utils.archive import ArchiveManager, ExportResult, create_project_archive
+from typing import TYPE_CHECKING
+
+from .utils.lazy import lazy_attrs
+
+# Komponenty, warstwy, orchestrator i narzędzia ładowane leniwie (PEP 562) -
+# import parsera nie wymaga ładowania backendów głosowych ani wrapperów subprocess
+_LAZY_ATTRS = {
+    "DSLParser": ".core.dsl_parser",
+    "ContextManager": ".core.context_manager",
+    "SuggestionEngine": ".core.suggestion_engine",
+    "VoiceLayer": ".layers.voice_layer",
+    "VoiceConfig": ".layers.voice_layer",
+    "VoiceBackend": ".layers.voice_layer",
+    "Language": ".layers.voice_layer",
+    "LanguageConfig": ".layers.voice_layer",
+    "LANGUAGE_CONFIGS": ".layers.voice_layer",
+    "get_language_config": ".layers.voice_layer",
+    "Text2Make": ".layers.text2make",
+    "Text2Shell": ".layers.text2shell",
+    "Text2Git": ".layers.text2git",
+    "Text2Docker": ".layers.text2docker",
+    "Text2Python": ".layers.text2python",
+    "Text2DSLOrchestrator": ".orchestrator",
+    "OrchestratorConfig": ".orchestrator",
+    "ExecutionResponse": ".orchestrator",
+    "ArchiveManager": ".utils.archive",
+    "ExportResult": ".utils.archive",
+    "create_project_archive": ".utils.archive",
+}
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
+
+if TYPE_CHECKING:
+    from .core.dsl_parser import DSLParser
+    from .core.context_manager import ContextManager
+    from .core.suggestion_engine import SuggestionEngine
+    from .layers.voice_layer import (
+        VoiceLayer,
+        VoiceConfig,
+        VoiceBackend,
+        Language,
+        LanguageConfig,
+        LANGUAGE_CONFIGS,
+        get_language_config,
+    )
+    from .layers.text2make import Text2Make
+    from .layers.text2shell import Text2Shell
+    from .layers.text2git import Text2Git
+    from .layers.text2docker import Text2Docker
+    from .layers.text2python import Text2Python
+    from .orchestrator import Text2DSLOrchestrator, OrchestratorConfig, ExecutionResponse
+    from .utils.archive import ArchiveManager, ExportResult, create_project_archive
 
 __all__ = [
     # Core
@@ -18,6 +18,10 @@ import sys
 from pathlib import Path
 
 
+# Wielojęzyczne etykiety sugestii
+_SUGGESTION_LABELS = {"pl": "Sugestie", "de": "Vorschläge", "en": "Suggestions"}
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="text2dsl - Głosowa nawigacja CLI (PL/DE/EN)",
@@ -112,13 +116,10 @@ Obsługiwane języki:
         if env_lang in ["pl", "de", "en"]:
             args.lang = env_lang
 
-    # Import głównych komponentów
-    from .orchestrator import Text2DSLOrchestrator, OrchestratorConfig
-    from .layers.voice_layer import VoiceConfig, get_language_config
-    from .utils.archive import ArchiveManager
-
     # Eksport projektu
     if args.export:
+        from .utils.archive import ArchiveManager
+
         source_dir = args.directory or "."
         manager = ArchiveManager(source_dir)
 
@@ -139,6 +140,8 @@ Obsługiwane języki:
 
     # Lista plików
     if args.list_files:
+        from .utils.archive import ArchiveManager
+
         source_dir = args.directory or "."
         manager = ArchiveManager(source_dir)
         files = manager.list_files()
@@ -152,6 +155,10 @@ Obsługiwane języki:
         print(f"\nRozmiar: {manager.format_size(manager.get_project_size())}")
         return 0
 
+    # Import głównych komponentów - tylko gdy potrzebny jest orchestrator
+    from .orchestrator import Text2DSLOrchestrator, OrchestratorConfig
+    from .layers.voice_layer import VoiceConfig, get_language_config
+
     # Konfiguracja języka
     lang_config = get_language_config(args.lang)
 
@@ -192,9 +199,7 @@ Obsługiwane języki:
         print(response.message)
 
         if not args.no_suggestions and response.suggestions:
-            # Wielojęzyczne etykiety
-            labels = {"pl": "Sugestie", "de": "Vorschläge", "en": "Suggestions"}
-            print(f"\n{labels.get(args.lang, 'Suggestions')}:")
+            print(f"\n{_SUGGESTION_LABELS.get(args.lang, 'Suggestions')}:")
             for s in response.suggestions[:3]:
                 print(f"  - {s.text}")
 
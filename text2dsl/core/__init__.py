@@ -1,8 +1,29 @@
 """Core components for text2dsl"""
 
-from .dsl_parser import DSLParser, ParsedCommand, CommandType
-from .context_manager import ContextManager, ProjectContext, ConversationState, ExecutionResult
-from .suggestion_engine import SuggestionEngine, Suggestion
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_attrs
+
+# Moduły core ładowane leniwie (PEP 562) - import ContextManager nie wymaga
+# ładowania parsera ani silnika sugestii
+_LAZY_ATTRS = {
+    "DSLParser": ".dsl_parser",
+    "ParsedCommand": ".dsl_parser",
+    "CommandType": ".dsl_parser",
+    "ContextManager": ".context_manager",
+    "ProjectContext": ".context_manager",
+    "ConversationState": ".context_manager",
+    "ExecutionResult": ".context_manager",
+    "SuggestionEngine": ".suggestion_engine",
+    "Suggestion": ".suggestion_engine",
+}
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
+
+if TYPE_CHECKING:
+    from .dsl_parser import DSLParser, ParsedCommand, CommandType
+    from .context_manager import ContextManager, ProjectContext, ConversationState, ExecutionResult
+    from .suggestion_engine import SuggestionEngine, Suggestion
 
 __all__ = [
     "DSLParser",
@@ -10,16 +10,50 @@ Przechowuje:
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Set
+from collections import deque
+from typing import Deque, Iterator, List, Optional, Dict, Any, Tuple, Union
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 import json
 import os
-
-
-@dataclass
+import re
+import sys
+import time
+
+from ..utils.compat import DATACLASS_SLOTS
+
+# Pliki, których zmiana treści (bez zmiany mtime katalogu) unieważnia kontekst
+_WATCHED_FILES = (
+    "Makefile",
+    "docker-compose.yml",
+    "docker-compose.yaml",
+    "compose.yml",
+    "compose.yaml",
+    os.path.join(".git", "HEAD"),
+)
+
+# Sekcja "project" z to_dict() gdy brak wykrytego projektu
+_EMPTY_PROJECT_DICT: Dict[str, Any] = {
+    "name": None,
+    "has_makefile": False,
+    "has_git": False,
+    "has_docker": False,
+    "has_python": False,
+}
+
+# Linia celu Makefile: bez wcięcia, komentarza i celów specjalnych (.PHONY),
+# nazwa do pierwszego ":" bez "=" (przypisania zmiennych)
+_MAKEFILE_TARGET_RE = re.compile(rb"^([^\s#.:=][^:=\n]*):", re.MULTILINE)
+
+# Klucz serwisu w sekcji services: pliku compose (wcięcie, nazwa)
+_COMPOSE_SERVICE_RE = re.compile(rb"^([ \t]+)([A-Za-z0-9_.-]+):\s*(?:#.*)?$")
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ProjectContext:
-    """Kontekst projektu"""
+    """Kontekst projektu (niemutowalny - instancje są współdzielone przez cache)"""
 
     path: Path
     name: str
@@ -34,21 +68,55 @@ class ProjectContext:
     python_venv: Optional[str] = None
 
     @classmethod
-    def from_path(cls, path: Path) -> "ProjectContext":
-        """Wykrywa kontekst projektu z podanej ścieżki"""
-        path = Path(path).resolve()
-        name = path.name
+    def from_path(cls, path: Path, resolve: bool = True) -> "ProjectContext":
+        """
+        Wykrywa kontekst projektu z podanej ścieżki
+
+        Wynik jest cache'owany po (ścieżka, mtime katalogu i plików projektu),
+        więc niezmieniony katalog nie jest ponownie skanowany ani parsowany.
+
+        Args:
+            path: Katalog projektu
+            resolve: False gdy ścieżka jest już absolutna i rozwiązana (bez realpath)
+        """
+        root = str(Path(path).resolve()) if resolve else os.fspath(path)
+        return cls._from_path_cached(root, cls._stamp(root))
 
-        ctx = cls(path=path, name=name)
+    @staticmethod
+    def _stamp(root: str) -> Tuple[int, ...]:
+        """Zwraca mtime_ns katalogu i obserwowanych plików (0 gdy brak)"""
+        stamp = []
+        for name in ("", *_WATCHED_FILES):
+            try:
+                stamp.append(os.stat(os.path.join(root, name)).st_mtime_ns)
+            except OSError:
+                stamp.append(0)
+        return tuple(stamp)
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _from_path_cached(cls, root: str, stamp: Tuple[int, ...]) -> "ProjectContext":
+        """Wykrywa kontekst projektu - cache po (ścieżka, znacznik mtime)"""
+        try:
+            with os.scandir(root) as it:
+                entries = {e.name: e for e in it}
+        except OSError:
+            entries = {}
+        return cls._detect(root, entries)
+
+    @classmethod
+    def _detect(cls, root: str, entries: Dict[str, os.DirEntry]) -> "ProjectContext":
+        """Buduje kontekst projektu na podstawie jednego listingu katalogu (os.scandir)"""
+        # Ścieżki plików składane jako str (os.path.join) - bez obiektów Path
+        fields: Dict[str, Any] = {}
 
         # Sprawdź Makefile
-        makefile = path / "Makefile"
-        if makefile.exists():
-            ctx.has_makefile = True
-            ctx.makefile_targets = cls._parse_makefile_targets(makefile)
+        if "Makefile" in entries:
+            fields["has_makefile"] = True
+            fields["makefile_targets"] = cls._parse_makefile_targets(os.path.join(root, "Makefile"))
 
         # Sprawdź Dockerfile
-        ctx.has_dockerfile = (path / "Dockerfile").exists()
+        fields["has_dockerfile"] = "Dockerfile" in entries
 
         # Sprawdź docker-compose
         for compose_file in [
@@ -57,108 +125,129 @@ class ProjectContext:
             "compose.yml",
             "compose.yaml",
         ]:
-            if (path / compose_file).exists():
-                ctx.has_docker_compose = True
-                ctx.docker_services = cls._parse_compose_services(path / compose_file)
+            if compose_file in entries:
+                fields["has_docker_compose"] = True
+                fields["docker_services"] = cls._parse_compose_services(
+                    os.path.join(root, compose_file)
+                )
                 break
 
         # Sprawdź Git
-        ctx.has_git = (path / ".git").exists()
-        if ctx.has_git:
-            ctx.git_branch = cls._get_git_branch(path)
+        fields["has_git"] = ".git" in entries
+        if fields["has_git"]:
+            fields["git_branch"] = cls._get_git_branch(root)
 
         # Sprawdź Python
-        ctx.has_python = any(
-            [
-                (path / "setup.py").exists(),
-                (path / "pyproject.toml").exists(),
-                (path / "requirements.txt").exists(),
-            ]
+        fields["has_python"] = not entries.keys().isdisjoint(
+            ("setup.py", "pyproject.toml", "requirements.txt")
         )
 
         # Sprawdź venv
+        # (typ wpisu z scandir - bez stat() dla np. pliku .env)
         for venv_dir in ["venv", ".venv", "env", ".env"]:
-            if (path / venv_dir / "bin" / "python").exists():
-                ctx.python_venv = str(path / venv_dir)
-                break
+            entry = entries.get(venv_dir)
+            if entry is not None and entry.is_dir():
+                venv_path = entry.path
+                if os.path.exists(os.path.join(venv_path, "bin", "python")):
+                    fields["python_venv"] = venv_path
+                    break
 
-        return ctx
+        path = Path(root)
+        return cls(path=path, name=path.name, **fields)
 
     @staticmethod
-    def _parse_makefile_targets(makefile: Path) -> List[str]:
+    def _parse_makefile_targets(makefile: Union[str, Path]) -> List[str]:
         """Parsuje cele z Makefile"""
-        targets = []
         try:
-            with open(makefile, "r") as f:
-                for line in f:
-                    # Szukaj linii zaczynających się od nazwy celu
-                    if ":" in line and not line.startswith("\t") and not line.startswith(" "):
-                        target = line.split(":")[0].strip()
-                        # Pomijaj cele specjalne i zmienne
-                        if target and not target.startswith(".") and "=" not in target:
-                            targets.append(target)
+            with open(makefile, "rb") as f:
+                data = f.read()
         except Exception:
-            pass
-        return targets
+            return []
+        # Jedno przejście wyrażenia po całym pliku - skanowanie linii w C
+        return [
+            match.group(1).strip().decode("utf-8", "replace")
+            for match in _MAKEFILE_TARGET_RE.finditer(data)
+        ]
 
     @staticmethod
-    def _parse_compose_services(compose_file: Path) -> List[str]:
-        """Parsuje serwisy z docker-compose"""
+    def _parse_compose_services(compose_file: Union[str, Path]) -> List[str]:
+        """Parsuje nazwy serwisów z docker-compose (bez PyYAML - tylko klucze services:)"""
         services = []
         try:
-            import yaml
-
-            with open(compose_file, "r") as f:
-                data = yaml.safe_load(f)
-                if data and "services" in data:
-                    services = list(data["services"].keys())
+            with open(compose_file, "rb") as f:
+                in_services = False
+                indent = None
+                for line in f:
+                    stripped = line.strip()
+                    if not in_services:
+                        in_services = line.split(b"#", 1)[0].rstrip() == b"services:"
+                        continue
+                    if not stripped or stripped.startswith(b"#"):
+                        continue
+                    # Koniec sekcji services: - następny klucz najwyższego poziomu
+                    if line[:1] not in (b" ", b"\t"):
+                        break
+                    match = _COMPOSE_SERVICE_RE.match(line)
+                    if match is None:
+                        continue
+                    # Wcięcie pierwszego serwisu wyznacza poziom nazw serwisów
+                    if indent is None:
+                        indent = match.group(1)
+                    if match.group(1) == indent:
+                        services.append(sys.intern(match.group(2).decode("utf-8", "replace")))
         except Exception:
-            # Prosty fallback bez yaml
-            try:
-                with open(compose_file, "r") as f:
-                    in_services = False
-                    for line in f:
-                        if line.strip() == "services:":
-                            in_services = True
-                            continue
-                        if in_services:
-                            if line.startswith("  ") and line[2] != " " and ":" in line:
-                                service = line.split(":")[0].strip()
-                                services.append(service)
-                            elif not line.startswith(" ") and line.strip():
-                                break
-            except Exception:
-                pass
+            pass
         return services
 
     @staticmethod
-    def _get_git_branch(path: Path) -> Optional[str]:
-        """Pobiera aktualną gałąź Git"""
+    def _get_git_branch(path: Union[str, Path]) -> Optional[str]:
+        """
+        Pobiera aktualną gałąź Git
+
+        Wywoływane tylko przy ponownym wykrywaniu kontekstu - mtime .git/HEAD
+        jest częścią klucza cache from_path, więc niezmieniony HEAD nie jest czytany.
+        """
+        # Linia ref jest krótka i ASCII - jeden os.read() bez warstwy plików i kodeków
         try:
-            head_file = path / ".git" / "HEAD"
-            if head_file.exists():
-                content = head_file.read_text().strip()
-                if content.startswith("ref: refs/heads/"):
-                    return content.replace("ref: refs/heads/", "")
-        except Exception:
-            pass
+            fd = os.open(os.path.join(path, ".git", "HEAD"), os.O_RDONLY)
+            try:
+                content = os.read(fd, 256).strip()
+            finally:
+                os.close(fd)
+        except OSError:
+            return None
+        if content.startswith(b"ref: refs/heads/"):
+            return content[len(b"ref: refs/heads/") :].decode("ascii", "replace")
         return None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ConversationState:
     """Stan pojedynczej rozmowy/sesji"""
 
     started_at: datetime = field(default_factory=datetime.now)
-    last_activity: datetime = field(default_factory=datetime.now)
     command_count: int = 0
     last_command_type: Optional[str] = None
     last_target: Optional[str] = None
     pending_confirmation: Optional[Dict[str, Any]] = None
     variables: Dict[str, Any] = field(default_factory=dict)
+    # Znaczniki monotoniczne (ns) - tanie przy każdej komendzie, datetime liczony na żądanie
+    started_ns: int = field(default_factory=time.monotonic_ns, repr=False)
+    last_activity_ns: int = field(default_factory=time.monotonic_ns, repr=False)
+
+    @property
+    def last_activity(self) -> datetime:
+        """Czas ostatniej aktywności (wyliczany z started_at i zegara monotonicznego)"""
+        elapsed_us = (self.last_activity_ns - self.started_ns) // 1000
+        return self.started_at + timedelta(microseconds=elapsed_us)
+
+    @last_activity.setter
+    def last_activity(self, value: datetime):
+        elapsed_us = (value - self.started_at) // timedelta(microseconds=1)
+        self.last_activity_ns = self.started_ns + elapsed_us * 1000
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ExecutionResult:
     """Wynik wykonania komendy"""
 
@@ -181,18 +270,24 @@ class ContextManager:
     - Historia operacji
     """
 
-    def __init__(self, working_dir: Optional[str] = None):
-        self.working_dir = Path(working_dir or os.getcwd()).resolve()
+    def __init__(self, working_dir: Optional[str] = None, *, resolve: bool = True):
+        # resolve=False dla już absolutnej, rozwiązanej ścieżki - bez realpath
+        working_path = Path(working_dir or os.getcwd())
+        self.working_dir = working_path.resolve() if resolve else working_path
         self.project: Optional[ProjectContext] = None
         self.state = ConversationState()
-        self.execution_history: List[ExecutionResult] = []
+        self.execution_history: Deque[ExecutionResult] = deque(maxlen=100)
+        # Opcje kontekstowe projektu i instancja kontekstu, z której je zbudowano
+        self._base_options: Dict[str, List[str]] = {}
+        self._base_options_project: Optional[ProjectContext] = None
 
         # Automatyczne wykrycie projektu
         self.refresh_project_context()
 
     def refresh_project_context(self):
         """Odświeża kontekst projektu"""
-        self.project = ProjectContext.from_path(self.working_dir)
+        # working_dir jest już rozwiązany (w __init__ lub change_directory)
+        self.project = ProjectContext.from_path(self.working_dir, resolve=False)
 
     def change_directory(self, path: str) -> bool:
         """Zmienia katalog roboczy"""
@@ -207,47 +302,58 @@ class ContextManager:
             return True
         return False
 
-    def get_contextual_options(self) -> Dict[str, List[str]]:
-        """
-        Zwraca kontekstowe opcje na podstawie aktualnego stanu
-
-        Returns:
-            Słownik z kategoriami i dostępnymi opcjami
-        """
+    def _build_base_options(self, project: ProjectContext) -> Dict[str, List[str]]:
+        """Buduje opcje zależne tylko od kontekstu projektu (bez stanu rozmowy)"""
         options: Dict[str, List[str]] = {}
 
-        if not self.project:
-            return {"general": ["cd <katalog>", "pwd", "ls"]}
-
         # Opcje Make
-        if self.project.has_makefile:
-            options["make"] = [f"make {t}" for t in self.project.makefile_targets[:5]]
+        if project.has_makefile:
+            options["make"] = [f"make {t}" for t in project.makefile_targets[:5]]
 
         # Opcje Git
-        if self.project.has_git:
+        if project.has_git:
             git_opts = ["status", "pull", "push", "commit"]
-            if self.project.git_branch:
-                git_opts.insert(0, f"branch: {self.project.git_branch}")
+            if project.git_branch:
+                git_opts.insert(0, f"branch: {project.git_branch}")
             options["git"] = git_opts
 
         # Opcje Docker
-        if self.project.has_dockerfile or self.project.has_docker_compose:
+        if project.has_dockerfile or project.has_docker_compose:
             docker_opts = []
-            if self.project.has_dockerfile:
+            if project.has_dockerfile:
                 docker_opts.extend(["docker build", "docker run"])
-            if self.project.has_docker_compose:
+            if project.has_docker_compose:
                 docker_opts.extend(["compose up", "compose down"])
-                for svc in self.project.docker_services[:3]:
+                for svc in project.docker_services[:3]:
                     docker_opts.append(f"compose logs {svc}")
             options["docker"] = docker_opts
 
         # Opcje Python
-        if self.project.has_python:
+        if project.has_python:
             py_opts = ["pytest", "pip install -r requirements.txt"]
-            if self.project.python_venv:
+            if project.python_venv:
                 py_opts.insert(0, "venv: aktywne")
             options["python"] = py_opts
 
+        return options
+
+    def get_contextual_options(self) -> Dict[str, List[str]]:
+        """
+        Zwraca kontekstowe opcje na podstawie aktualnego stanu
+
+        Returns:
+            Słownik z kategoriami i dostępnymi opcjami
+        """
+        if not self.project:
+            return {"general": ["cd <katalog>", "pwd", "ls"]}
+
+        # Opcje projektu liczone raz na instancję kontekstu (ProjectContext jest
+        # niemutowalny, a niezmieniony katalog zwraca tę samą instancję z cache)
+        if self._base_options_project is not self.project:
+            self._base_options = self._build_base_options(self.project)
+            self._base_options_project = self.project
+        options = {category: list(opts) for category, opts in self._base_options.items()}
+
         # Opcje kontekstowe na podstawie ostatniej akcji
         if self.state.last_command_type:
             if self.state.last_command_type == "MAKE" and self.state.last_target:
@@ -261,58 +367,58 @@ class ContextManager:
 
         return options
 
-    def get_smart_suggestions(self, partial_input: str = "") -> List[str]:
-        """
-        Generuje inteligentne sugestie na podstawie kontekstu
-
-        Args:
-            partial_input: Częściowe wejście użytkownika
-
-        Returns:
-            Lista sugestii posortowana wg relevancji
-        """
-        suggestions = []
-
+    def _iter_smart_suggestions(self) -> Iterator[str]:
+        """Generuje sugestie kontekstowe leniwie, w kolejności relevancji"""
         # Sugestie na podstawie ostatniej operacji
         if self.execution_history:
-            last = self.execution_history[-1]
-            if not last.success:
-                suggestions.append("powtórz ostatnią komendę")
-                suggestions.append("pokaż błąd")
+            if not self.execution_history[-1].success:
+                yield "powtórz ostatnią komendę"
+                yield "pokaż błąd"
             else:
-                suggestions.append("dalej")
+                yield "dalej"
 
         # Sugestie specyficzne dla projektu
         if self.project:
             if self.project.has_makefile and self.project.makefile_targets:
-                suggestions.append(f"zbuduj (make {self.project.makefile_targets[0]})")
+                yield f"zbuduj (make {self.project.makefile_targets[0]})"
 
             if self.project.has_git:
-                suggestions.append("sprawdź status git")
+                yield "sprawdź status git"
 
             if self.project.has_docker_compose:
-                suggestions.append("uruchom kontenery")
+                yield "uruchom kontenery"
+
+    def get_smart_suggestions(self, partial_input: str = "") -> List[str]:
+        """
+        Generuje inteligentne sugestie na podstawie kontekstu
+
+        Args:
+            partial_input: Częściowe wejście użytkownika
+
+        Returns:
+            Lista sugestii posortowana wg relevancji
+        """
+        suggestions = self._iter_smart_suggestions()
 
         # Filtruj po częściowym wejściu
         if partial_input:
             partial_lower = partial_input.lower()
-            suggestions = [s for s in suggestions if partial_lower in s.lower()]
+            suggestions = (s for s in suggestions if partial_lower in s.lower())
 
-        return suggestions[:5]
+        # Generowanie kończy się po 5 sugestiach
+        return list(islice(suggestions, 5))
 
     def update_state(self, command_type: str, target: Optional[str] = None):
         """Aktualizuje stan konwersacji"""
-        self.state.last_activity = datetime.now()
+        self.state.last_activity_ns = time.monotonic_ns()
         self.state.command_count += 1
-        self.state.last_command_type = command_type
+        # Mały, stały zbiór wartości (MAKE, GIT, ...) - porównania == po wskaźniku
+        self.state.last_command_type = sys.intern(command_type) if command_type else None
         self.state.last_target = target
 
     def add_execution_result(self, result: ExecutionResult):
         """Dodaje wynik wykonania do historii"""
         self.execution_history.append(result)
-        # Ogranicz historię
-        if len(self.execution_history) > 100:
-            self.execution_history = self.execution_history[-100:]
 
     def set_pending_confirmation(self, action: str, details: Dict[str, Any]):
         """Ustawia akcję oczekującą na potwierdzenie"""
@@ -340,17 +446,22 @@ class ContextManager:
 
     def to_dict(self) -> Dict[str, Any]:
         """Serializuje kontekst do słownika"""
+        project, state = self.project, self.state
+        if project is None:
+            project_dict = dict(_EMPTY_PROJECT_DICT)
+        else:
+            project_dict = {
+                "name": project.name,
+                "has_makefile": project.has_makefile,
+                "has_git": project.has_git,
+                "has_docker": project.has_dockerfile,
+                "has_python": project.has_python,
+            }
         return {
             "working_dir": str(self.working_dir),
-            "project": {
-                "name": self.project.name if self.project else None,
-                "has_makefile": self.project.has_makefile if self.project else False,
-                "has_git": self.project.has_git if self.project else False,
-                "has_docker": self.project.has_dockerfile if self.project else False,
-                "has_python": self.project.has_python if self.project else False,
-            },
+            "project": project_dict,
             "state": {
-                "command_count": self.state.command_count,
-                "last_command": self.state.last_command_type,
+                "command_count": state.command_count,
+                "last_command": state.last_command_type,
             },
         }
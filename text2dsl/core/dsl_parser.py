@@ -7,10 +7,18 @@ Obsługuje składnię:
 - Komendy złożone: "zbuduj i uruchom testy"
 """
 
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from itertools import islice
+from typing import Deque, Iterator, List, Optional, Dict, Any, Set, Tuple
 from enum import Enum, auto
 import re
+import string
+import sys
+
+from ..utils.compat import DATACLASS_SLOTS
 
 
 class CommandType(Enum):
@@ -26,7 +34,7 @@ class CommandType(Enum):
     COMPOUND = auto()  # komendy złożone
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ParsedCommand:
     """Sparsowana komenda DSL"""
 
@@ -205,6 +213,10 @@ MULTILANG_ACTION_PATTERNS = {
 }
 
 
+# Interpunkcja i białe znaki usuwane z końca wejścia przy normalizacji
+_TRAILING_PUNCTUATION = ".!?" + string.whitespace
+
+
 # Wielojęzyczne skróty kontekstowe
 MULTILANG_CONTEXT_SHORTCUTS = {
     "pl": {
@@ -246,6 +258,262 @@ MULTILANG_CONTEXT_SHORTCUTS = {
 }
 
 
+# Charakterystyczne słowa dla każdego języka (wykrywanie języka)
+LANGUAGE_INDICATORS = {
+    "pl": ["zbuduj", "uruchom", "pokaż", "wypchnij", "pobierz", "dalej", "cofnij", "tak", "nie"],
+    "de": [
+        "bauen",
+        "ausführen",
+        "zeigen",
+        "hochladen",
+        "herunterladen",
+        "weiter",
+        "zurück",
+        "ja",
+        "nein",
+    ],
+    "en": ["build", "run", "show", "push", "pull", "next", "back", "yes", "no"],
+}
+
+_INDICATOR_LANGUAGE = {word: lang for lang, words in LANGUAGE_INDICATORS.items() for word in words}
+
+# Lookahead w każdej pozycji - znajduje też wystąpienia nachodzące na siebie,
+# tak jak osobne sprawdzenia "słowo in tekst"; dłuższe słowa mają pierwszeństwo
+_LANGUAGE_INDICATOR_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(_INDICATOR_LANGUAGE, key=len, reverse=True))) + "))"
+)
+
+
+# Wielojęzyczne początki/końce zapytań
+MULTILANG_QUERY_STARTERS = {
+    "pl": ["co ", "jaki ", "jak ", "gdzie ", "czy ", "pomoc", "?"],
+    "de": ["was ", "welche ", "wie ", "wo ", "hilfe", "?"],
+    "en": ["what ", "which ", "how ", "where ", "help", "?"],
+}
+
+
+# Krotki znaczników - str.startswith/endswith sprawdzają je w jednym wywołaniu
+_QUERY_MARKERS = {lang: tuple(starters) for lang, starters in MULTILANG_QUERY_STARTERS.items()}
+
+
+# Wielojęzyczne słowa rozróżniające rodzaj zapytania (kolejność = priorytet)
+MULTILANG_QUERY_WORDS = {
+    "pl": {
+        "options": ["opcje", "możliwości", "co mogę"],
+        "status": ["status", "stan"],
+        "help": ["pomoc"],
+    },
+    "de": {
+        "options": ["optionen", "möglichkeiten", "was kann"],
+        "status": ["status", "stand"],
+        "help": ["hilfe"],
+    },
+    "en": {
+        "options": ["options", "possibilities", "what can"],
+        "status": ["status", "state"],
+        "help": ["help"],
+    },
+}
+
+
+def _compile_query_action_pattern(words: Dict[str, List[str]]) -> "re.Pattern[str]":
+    """
+    Jedno wyrażenie klasyfikujące zapytanie - gałąź (grupa nazwana akcją) na
+    rodzaj zapytania; lookahead zachowuje priorytet kolejności rodzajów
+    """
+    alternatives = [
+        f"(?=.*?(?P<{action}>{'|'.join(map(re.escape, phrases))}))"
+        for action, phrases in words.items()
+    ]
+    return re.compile("^(?:" + "|".join(alternatives) + ")", re.DOTALL)
+
+
+_QUERY_ACTION_PATTERNS = {
+    lang: _compile_query_action_pattern(words) for lang, words in MULTILANG_QUERY_WORDS.items()
+}
+
+
+def _pattern_language(language: str) -> str:
+    """Język tabeli wzorców akcji (angielski dla nieobsługiwanych)"""
+    return language if language in MULTILANG_ACTION_PATTERNS else "en"
+
+
+def _context_shortcuts(language: str) -> Dict[str, str]:
+    """Skróty kontekstowe języka (angielskie dla nieobsługiwanych)"""
+    return MULTILANG_CONTEXT_SHORTCUTS.get(language, MULTILANG_CONTEXT_SHORTCUTS["en"])
+
+
+@lru_cache(maxsize=None)
+def _compile_action_patterns(
+    language: str,
+) -> Tuple["re.Pattern[str]", Dict[str, Tuple[Tuple[str, str, Optional[int]], int]]]:
+    """
+    Łączy wzorce akcji języka w jedno skompilowane wyrażenie (raz na język)
+
+    Każdy wzorzec jest osobną gałęzią alternatywy w lookahead zakotwiczonym
+    na początku tekstu, więc jedno wywołanie match() daje ten sam wynik co
+    re.search() kolejnych wzorców - wygrywa pierwszy pasujący wzorzec.
+    Wzorce zakotwiczone (^...) są sprawdzane tylko od początku tekstu -
+    bez prefiksu .*?, który próbowałby każdej pozycji.
+
+    Returns:
+        (wyrażenie, {nazwa grupy: ((typ, akcja, grupa celu), liczba grup wzorca)})
+    """
+    alternatives = []
+    dispatch: Dict[str, Tuple[Tuple[str, str, Optional[int]], int]] = {}
+    for i, (pattern, spec) in enumerate(MULTILANG_ACTION_PATTERNS[language].items()):
+        name = f"p{i}"
+        prefix = "" if pattern.startswith("^") else ".*?"
+        alternatives.append(f"(?={prefix}(?P<{name}>{pattern}))")
+        cmd_type, action, target_group = spec
+        dispatch[name] = ((cmd_type, sys.intern(action), target_group), re.compile(pattern).groups)
+
+    combined = re.compile("^(?:" + "|".join(alternatives) + ")", re.IGNORECASE | re.DOTALL)
+    return combined, dispatch
+
+
+# Wzorzec będący samą alternatywą stałych słów, np. "^(wyczyść|clean)$"
+_LITERAL_ALTERNATION_RE = re.compile(r"\^?\(([^\\()\[\]{}.*+?^$]+)\)\$?")
+
+
+@lru_cache(maxsize=None)
+def _literal_action_commands(language: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Komendy rozpoznawane przez dokładne dopasowanie całego tekstu (raz na język)
+
+    Słowa ze wzorców będących samą alternatywą stałych ("clean", "push",
+    "status"...) trafiają do słownika, więc najczęstsze krótkie komendy nie
+    uruchamiają wyrażenia regularnego. Słowo jest dodawane tylko wtedy, gdy
+    połączone wyrażenie też przypisuje je temu wzorcowi - wynik się nie zmienia.
+
+    Returns:
+        {tekst: (typ, akcja)}
+    """
+    combined, dispatch = _compile_action_patterns(language)
+    literals: Dict[str, Tuple[str, str]] = {}
+    for i, (pattern, (_, _, target_group)) in enumerate(
+        MULTILANG_ACTION_PATTERNS[language].items()
+    ):
+        literal = _LITERAL_ALTERNATION_RE.fullmatch(pattern)
+        if not literal or target_group:
+            continue
+        name = f"p{i}"
+        for word in literal.group(1).split("|"):
+            match = combined.match(word)
+            if match and match.lastgroup == name and word not in literals:
+                cmd_type, action, _ = dispatch[name][0]
+                literals[word] = (cmd_type, action)
+    return literals
+
+
+class _KeywordTrie:
+    """
+    Drzewo prefiksowe fraz kluczowych
+
+    Krawędziami są kolejne słowa frazy (węzły to zagnieżdżone słowniki),
+    więc frazy wielowyrazowe ("uruchom cel") są dopasowywane tak samo jak
+    pojedyncze słowa. Węzeł końcowy przechowuje listę payloadów
+    (CommandType, akcja) - to samo słowo może należeć do kilku typów.
+    """
+
+    _PAYLOADS = None  # klucz payloadów w węźle (słowa są zawsze str)
+
+    def __init__(self):
+        self.root: Dict[Any, Any] = {}
+        # Kolejność pierwszego wstawienia frazy - sugestie w kolejności słów kluczowych
+        self._order: Dict[str, int] = {}
+        # Posortowane słowa dzieci węzła (id węzła -> słowa)
+        self._sorted_children: Dict[int, List[str]] = {}
+
+    def insert(self, tokens: List[str], payload: Tuple[CommandType, str]):
+        """Dodaje frazę (listę słów) z payloadem"""
+        node = self.root
+        for token in tokens:
+            # Słowa z split() nie są internowane - wspólne obiekty dla kluczy węzłów
+            node = node.setdefault(sys.intern(token), {})
+        node.setdefault(self._PAYLOADS, []).append(payload)
+        self._order.setdefault(" ".join(tokens), len(self._order))
+        self._sorted_children.clear()
+
+    def _children_with_prefix(self, node: Dict[Any, Any], partial: str) -> List[str]:
+        """Słowa dzieci węzła zaczynające się od partial (bisect)"""
+        words = self._sorted_children.get(id(node))
+        if words is None:
+            words = sorted(token for token in node if token is not self._PAYLOADS)
+            self._sorted_children[id(node)] = words
+
+        matched = []
+        for i in range(bisect_left(words, partial), len(words)):
+            if not words[i].startswith(partial):
+                break
+            matched.append(words[i])
+        return matched
+
+    def iter_matches(
+        self, tokens: List[str], start: int = 0
+    ) -> Iterator[Tuple[int, List[Tuple[CommandType, str]]]]:
+        """
+        Zwraca wszystkie frazy zaczynające się od tokens[start] (krótsze i dłuższe)
+
+        Yields:
+            (indeks za dopasowaniem, payloady)
+        """
+        node = self.root
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                return
+            if self._PAYLOADS in node:
+                yield i + 1, node[self._PAYLOADS]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Zwraca frazy zaczynające się od prefiksu, w kolejności wstawienia"""
+        tokens = prefix.split()
+        partial = "" if not tokens or prefix.endswith(" ") else tokens.pop()
+
+        node = self.root
+        for token in tokens:
+            node = node.get(token)
+            if node is None:
+                return []
+
+        results: List[str] = []
+        stack = [
+            (tokens + [token], node[token]) for token in self._children_with_prefix(node, partial)
+        ]
+        while stack:
+            path, current = stack.pop()
+            if self._PAYLOADS in current:
+                results.append(" ".join(path))
+            stack.extend(
+                (path + [token], child)
+                for token, child in current.items()
+                if token is not self._PAYLOADS
+            )
+        results.sort(key=self._order.__getitem__)
+        return results[:limit]
+
+
+@lru_cache(maxsize=None)
+def _build_keyword_index(language: str) -> Tuple[Dict[CommandType, List[str]], _KeywordTrie]:
+    """
+    Buduje słowa kluczowe języka i ich drzewo prefiksowe (raz na język)
+
+    Wynik jest współdzielony przez wszystkie instancje parsera - zmiana
+    języka to tylko przypisanie referencji.
+    """
+    keywords = {
+        cmd_type: lang_keywords.get(language, lang_keywords.get("en", []))
+        for cmd_type, lang_keywords in MULTILANG_KEYWORDS.items()
+    }
+
+    trie = _KeywordTrie()
+    for cmd_type, phrases in keywords.items():
+        for kw in phrases:
+            trie.insert(kw.split(), (cmd_type, "inferred"))
+    return keywords, trie
+
+
 class DSLParser:
     """
     Parser DSL dla głosowej nawigacji CLI
@@ -261,24 +529,22 @@ class DSLParser:
     def __init__(self, language: str = "pl"):
         self.language = language.lower()[:2]
         self.last_command: Optional[ParsedCommand] = None
-        self.command_history: List[ParsedCommand] = []
+        # Historia ograniczona do 50 elementów (deque sam usuwa najstarsze)
+        self.command_history: Deque[ParsedCommand] = deque(maxlen=50)
+
+        # Cache wyników parsowania - klucz: (znormalizowany tekst, język)
+        self._parse_normalized = lru_cache(maxsize=512)(self._parse_normalized)
 
         # Pobierz mapowania dla aktualnego języka
         self._update_language_mappings()
 
     def _update_language_mappings(self):
         """Aktualizuje mapowania dla aktualnego języka"""
-        self.keywords = {}
-        for cmd_type, lang_keywords in MULTILANG_KEYWORDS.items():
-            self.keywords[cmd_type] = lang_keywords.get(self.language, lang_keywords.get("en", []))
+        self.keywords, self._keyword_trie = _build_keyword_index(self.language)
 
-        self.action_patterns = MULTILANG_ACTION_PATTERNS.get(
-            self.language, MULTILANG_ACTION_PATTERNS["en"]
-        )
+        self.action_patterns = MULTILANG_ACTION_PATTERNS[_pattern_language(self.language)]
 
-        self.context_shortcuts = MULTILANG_CONTEXT_SHORTCUTS.get(
-            self.language, MULTILANG_CONTEXT_SHORTCUTS["en"]
-        )
+        self.context_shortcuts = _context_shortcuts(self.language)
 
     def set_language(self, language: str):
         """Zmienia język parsera"""
@@ -292,41 +558,12 @@ class DSLParser:
         Returns:
             Kod języka (pl, de, en)
         """
-        text_lower = text.lower()
-
-        # Charakterystyczne słowa dla każdego języka
-        lang_indicators = {
-            "pl": [
-                "zbuduj",
-                "uruchom",
-                "pokaż",
-                "wypchnij",
-                "pobierz",
-                "dalej",
-                "cofnij",
-                "tak",
-                "nie",
-            ],
-            "de": [
-                "bauen",
-                "ausführen",
-                "zeigen",
-                "hochladen",
-                "herunterladen",
-                "weiter",
-                "zurück",
-                "ja",
-                "nein",
-            ],
-            "en": ["build", "run", "show", "push", "pull", "next", "back", "yes", "no"],
-        }
-
-        scores = {lang: 0 for lang in lang_indicators}
-
-        for lang, indicators in lang_indicators.items():
-            for word in indicators:
-                if word in text_lower:
-                    scores[lang] += 1
+        # Jedno przejście wyrażenia zamiast osobnego "in" dla każdego słowa
+        found = set(_LANGUAGE_INDICATOR_RE.findall(text.casefold()))
+
+        scores = dict.fromkeys(LANGUAGE_INDICATORS, 0)
+        for word in found:
+            scores[_INDICATOR_LANGUAGE[word]] += 1
 
         best_lang = max(scores, key=scores.get)
         return best_lang if scores[best_lang] > 0 else self.language
@@ -342,72 +579,79 @@ class DSLParser:
         Returns:
             ParsedCommand z rozpoznaną intencją
         """
-        # Opcjonalne wykrywanie języka
-        detected_lang = self.language
-        if auto_detect_lang:
-            detected_lang = self.detect_language(input_text)
-            if detected_lang != self.language:
-                self.set_language(detected_lang)
+        # Opcjonalne wykrywanie języka - tylko dla tego wywołania; język parsera
+        # (self.language) się nie zmienia, tabele języka są indeksowane przez lang
+        detected_lang = self.detect_language(input_text) if auto_detect_lang else self.language
 
         # Normalizacja wejścia
         normalized = self._normalize(input_text)
 
-        # Sprawdź skróty kontekstowe
-        if normalized in self.context_shortcuts:
-            return self._handle_context_shortcut(normalized, input_text, detected_lang)
+        # Sprawdź skróty kontekstowe (jedno wyszukiwanie w słowniku)
+        shortcut_action = _context_shortcuts(detected_lang).get(normalized.casefold())
+        if shortcut_action is not None:
+            return self._handle_context_shortcut(shortcut_action, input_text, detected_lang)
 
-        # Sprawdź czy to zapytanie
-        if self._is_query(normalized):
-            return self._parse_query(normalized, input_text, detected_lang)
+        cached, record = self._parse_normalized(normalized, detected_lang)
+
+        # Kopia - obiekt w cache nie może być modyfikowany przez historię
+        command = replace(
+            cached, raw_input=input_text, args=list(cached.args), flags=dict(cached.flags)
+        )
+        if record:
+            self._update_history(command)
+        return command
+
+    def _parse_normalized(self, normalized: str, lang: str) -> Tuple[ParsedCommand, bool]:
+        """
+        Parsuje znormalizowany tekst (bez stanu - wynik jest cache'owany)
+
+        Returns:
+            (ParsedCommand bez raw_input, czy zapisać komendę w historii)
+        """
+        # Sprawdź czy to zapytanie (dopasowanie bez wielkości liter)
+        folded = normalized.casefold()
+        if self._is_query(folded, lang):
+            return self._parse_query(folded, "", lang), False
 
         # Próbuj dopasować do wzorców
-        command = self._match_patterns(normalized, input_text, detected_lang)
+        command = self._match_patterns(normalized, "", lang)
         if command:
-            self._update_history(command)
-            return command
+            return command, True
 
         # Próbuj rozpoznać typ po słowach kluczowych
-        command = self._infer_from_keywords(normalized, input_text, detected_lang)
+        command = self._infer_from_keywords(normalized, "", lang)
         if command:
-            self._update_history(command)
-            return command
+            return command, True
 
         # Nie rozpoznano - zwróć jako shell z niską pewnością
-        return ParsedCommand(
+        unknown = ParsedCommand(
             type=CommandType.SHELL,
             action="unknown",
-            raw_input=input_text,
             confidence=0.3,
             args=[normalized],
-            detected_language=detected_lang,
+            detected_language=lang,
         )
+        return unknown, False
 
     def _normalize(self, text: str) -> str:
-        """Normalizuje tekst wejściowy"""
-        text = text.lower().strip()
-        # Usuń interpunkcję końcową
-        text = re.sub(r"[.!?]+$", "", text)
-        # Zamień wielokrotne spacje na pojedyncze
-        text = re.sub(r"\s+", " ", text)
-        return text
-
-    def _handle_context_shortcut(self, shortcut: str, raw: str, lang: str = "pl") -> ParsedCommand:
-        """Obsługuje skróty kontekstowe"""
-        action = self.context_shortcuts.get(shortcut, shortcut)
+        """Normalizuje tekst wejściowy (wielkość liter zostaje - cele i argumenty z oryginału)"""
+        # Usuń interpunkcję końcową (wewnętrzna zostaje: "main.py", "==1.0"), potem
+        # zamień wielokrotne białe znaki na pojedyncze spacje (split/join zamiast regex)
+        return " ".join(text.rstrip(_TRAILING_PUNCTUATION).split())
 
+    def _handle_context_shortcut(self, action: str, raw: str, lang: str = "pl") -> ParsedCommand:
+        """Obsługuje skróty kontekstowe (action - akcja już odczytana ze skrótów)"""
         if action == "repeat" and self.last_command:
-            # Zwróć kopię ostatniej komendy
-            cmd = ParsedCommand(
-                type=self.last_command.type,
-                action=self.last_command.action,
-                target=self.last_command.target,
+            # Zwróć kopię ostatniej komendy (bez alternatyw)
+            return replace(
+                self.last_command,
                 args=self.last_command.args.copy(),
                 flags=self.last_command.flags.copy(),
                 raw_input=raw,
                 confidence=0.95,
+                alternatives=[],
                 detected_language=lang,
             )
-            return cmd
 
         return ParsedCommand(
             type=CommandType.CONTEXT,
@@ -417,49 +661,16 @@ class DSLParser:
             detected_language=lang,
         )
 
-    def _is_query(self, text: str) -> bool:
+    def _is_query(self, text: str, lang: str = "pl") -> bool:
         """Sprawdza czy tekst jest zapytaniem"""
-        # Wielojęzyczne query starters
-        query_starters = {
-            "pl": ["co ", "jaki ", "jak ", "gdzie ", "czy ", "pomoc", "?"],
-            "de": ["was ", "welche ", "wie ", "wo ", "hilfe", "?"],
-            "en": ["what ", "which ", "how ", "where ", "help", "?"],
-        }
-
-        starters = query_starters.get(self.language, query_starters["en"])
-        return any(text.startswith(q) or text.endswith(q) for q in starters)
+        markers = _QUERY_MARKERS.get(lang, _QUERY_MARKERS["en"])
+        return text.startswith(markers) or text.endswith(markers)
 
     def _parse_query(self, normalized: str, raw: str, lang: str = "pl") -> ParsedCommand:
         """Parsuje zapytanie"""
-        # Wielojęzyczne słowa kluczowe
-        options_words = {
-            "pl": ["opcje", "możliwości", "co mogę"],
-            "de": ["optionen", "möglichkeiten", "was kann"],
-            "en": ["options", "possibilities", "what can"],
-        }
-        status_words = {
-            "pl": ["status", "stan"],
-            "de": ["status", "stand"],
-            "en": ["status", "state"],
-        }
-        help_words = {
-            "pl": ["pomoc"],
-            "de": ["hilfe"],
-            "en": ["help"],
-        }
-
-        lang_options = options_words.get(lang, options_words["en"])
-        lang_status = status_words.get(lang, status_words["en"])
-        lang_help = help_words.get(lang, help_words["en"])
-
-        if any(w in normalized for w in lang_options):
-            action = "options"
-        elif any(w in normalized for w in lang_status):
-            action = "status"
-        elif any(w in normalized for w in lang_help):
-            action = "help"
-        else:
-            action = "query"
+        pattern = _QUERY_ACTION_PATTERNS.get(lang, _QUERY_ACTION_PATTERNS["en"])
+        match = pattern.match(normalized)
+        action = match.lastgroup if match else "query"
 
         return ParsedCommand(
             type=CommandType.QUERY,
@@ -473,60 +684,85 @@ class DSLParser:
         self, normalized: str, raw: str, lang: str = "pl"
     ) -> Optional[ParsedCommand]:
         """Dopasowuje tekst do zdefiniowanych wzorców"""
-        for pattern, (cmd_type, action, target_group) in self.action_patterns.items():
-            match = re.search(pattern, normalized, re.IGNORECASE)
-            if match:
-                target = None
-                if target_group and len(match.groups()) >= target_group:
-                    target = match.group(target_group)
-                    if target:
-                        target = target.strip()
-
-                return ParsedCommand(
-                    type=CommandType[cmd_type],
-                    action=action,
-                    target=target,
-                    raw_input=raw,
-                    confidence=0.85,
-                    detected_language=lang,
-                )
-        return None
+        pattern_lang = _pattern_language(lang)
+
+        # Pojedyncze stałe komendy - wyszukiwanie w słowniku zamiast wyrażenia
+        literal = _literal_action_commands(pattern_lang).get(normalized.casefold())
+        if literal is not None:
+            cmd_type, action = literal
+            return ParsedCommand(
+                type=CommandType[cmd_type],
+                action=action,
+                raw_input=raw,
+                confidence=0.85,
+                detected_language=lang,
+            )
+
+        # Wyrażenie ignoruje wielkość liter - cel pochodzi z tekstu w oryginalnej postaci
+        combined_pattern, pattern_dispatch = _compile_action_patterns(pattern_lang)
+        match = combined_pattern.match(normalized)
+        if not match:
+            return None
+
+        name = match.lastgroup
+        (cmd_type, action, target_group), group_count = pattern_dispatch[name]
+
+        target = None
+        if target_group and group_count >= target_group:
+            # Grupy wzorca są numerowane względem grupy nazwanej
+            target = match.group(match.re.groupindex[name] + target_group)
+            if target:
+                target = target.strip()
+
+        return ParsedCommand(
+            type=CommandType[cmd_type],
+            action=action,
+            target=target,
+            raw_input=raw,
+            confidence=0.85,
+            detected_language=lang,
+        )
 
     def _infer_from_keywords(
         self, normalized: str, raw: str, lang: str = "pl"
     ) -> Optional[ParsedCommand]:
         """Próbuje rozpoznać typ komendy po słowach kluczowych"""
         words_list = normalized.split()
-        words = set(words_list)
-
-        best_match: Optional[Tuple[CommandType, int]] = None
-
-        for cmd_type, keywords in self.keywords.items():
-            keyword_set = set(keywords)
-            overlap = len(words & keyword_set)
-            if overlap > 0:
-                if best_match is None or overlap > best_match[1]:
-                    best_match = (cmd_type, overlap)
-
-        if best_match:
-            return ParsedCommand(
-                type=best_match[0],
-                action="inferred",
-                raw_input=raw,
-                confidence=0.6,
-                args=words_list,
-                detected_language=lang,
-            )
+        # Słowa kluczowe dopasowywane bez wielkości liter, argumenty w oryginalnej postaci
+        folded_words = normalized.casefold().split()
+        keywords, keyword_trie = _build_keyword_index(lang)
+
+        # Różne dopasowane frazy na typ - powtórzenia liczą się raz, a frazy
+        # mogą się nakładać ("uruchom kontener" i "kontener")
+        matched: Dict[CommandType, Set[Tuple[str, ...]]] = {}
+        for start in range(len(folded_words)):
+            for end, payloads in keyword_trie.iter_matches(folded_words, start):
+                phrase = tuple(folded_words[start:end])
+                for cmd_type, _ in payloads:
+                    matched.setdefault(cmd_type, set()).add(phrase)
+
+        if not matched:
+            return None
+
+        if len(matched) == 1:
+            best_type = next(iter(matched))
+        else:
+            # Remis rozstrzyga kolejność typów w słowach kluczowych (pierwszy wygrywa)
+            best_type = max(keywords, key=lambda cmd_type: len(matched.get(cmd_type, ())))
 
-        return None
+        return ParsedCommand(
+            type=best_type,
+            action="inferred",
+            raw_input=raw,
+            confidence=0.6,
+            args=words_list,
+            detected_language=lang,
+        )
 
     def _update_history(self, command: ParsedCommand):
         """Aktualizuje historię komend"""
         self.last_command = command
         self.command_history.append(command)
-        # Ogranicz historię do 50 elementów
-        if len(self.command_history) > 50:
-            self.command_history = self.command_history[-50:]
 
     def get_suggestions(self, partial: str) -> List[str]:
         """
@@ -539,17 +775,14 @@ class DSLParser:
             Lista sugerowanych uzupełnień
         """
         suggestions = []
-        normalized = self._normalize(partial) if partial else ""
+        normalized = self._normalize(partial).casefold() if partial else ""
 
         # Sugestie na podstawie historii
-        for cmd in reversed(self.command_history[-10:]):
-            if not normalized or cmd.raw_input.lower().startswith(normalized):
+        for cmd in islice(reversed(self.command_history), 10):
+            if not normalized or cmd.raw_input.casefold().startswith(normalized):
                 suggestions.append(cmd.raw_input)
 
-        # Sugestie na podstawie słów kluczowych (używamy self.keywords)
-        for keywords in self.keywords.values():
-            for kw in keywords:
-                if not normalized or kw.startswith(normalized):
-                    suggestions.append(kw)
+        # Sugestie na podstawie słów kluczowych (poddrzewo prefiksu)
+        suggestions.extend(self._keyword_trie.complete(normalized, limit=10))
 
         return list(dict.fromkeys(suggestions))[:5]  # Unikalne, max 5
@@ -8,14 +8,17 @@ Generuje sugestie na podstawie:
 - Wzorców użycia
 """
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple, Set
-from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Deque, Iterator, List, Dict, Optional, Tuple, Set
+from collections import Counter, defaultdict, deque
 from datetime import datetime, timedelta
+import heapq
 import re
 
+from ..utils.compat import DATACLASS_SLOTS
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class Suggestion:
     """Pojedyncza sugestia"""
 
@@ -25,9 +28,16 @@ class Suggestion:
     score: float = 0.0
     description: Optional[str] = None
     shortcut: Optional[str] = None
+    # Tekst i komenda po casefold() - liczone raz, filtrowane przy każdym znaku
+    _text_lower: str = field(init=False, repr=False, compare=False)
+    _command_lower: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._text_lower = self.text.casefold()
+        self._command_lower = self.command.casefold()
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class UsagePattern:
     """Wzorzec użycia komend"""
 
@@ -60,59 +70,85 @@ class SuggestionEngine:
 
     # Sugestie dla różnych kontekstów
     CONTEXT_SUGGESTIONS = {
-        "makefile": [
+        "makefile": (
             Suggestion("zbuduj projekt", "make all", "make", 0.9, "Wykonaj domyślny cel"),
             Suggestion("wyczyść", "make clean", "make", 0.7, "Wyczyść build"),
             Suggestion("uruchom testy", "make test", "make", 0.8, "Uruchom testy"),
             Suggestion("zainstaluj", "make install", "make", 0.6),
-        ],
-        "git": [
+        ),
+        "git": (
             Suggestion("sprawdź status", "git status", "git", 0.95),
             Suggestion("pobierz zmiany", "git pull", "git", 0.85),
             Suggestion("wypchnij zmiany", "git push", "git", 0.8),
             Suggestion("zatwierdź zmiany", "git commit", "git", 0.75),
             Suggestion("pokaż historię", "git log --oneline -10", "git", 0.6),
-        ],
-        "docker": [
+        ),
+        "docker": (
             Suggestion("zbuduj obraz", "docker build -t app .", "docker", 0.85),
             Suggestion("uruchom kontener", "docker run", "docker", 0.8),
             Suggestion("pokaż kontenery", "docker ps", "docker", 0.9),
             Suggestion("pokaż obrazy", "docker images", "docker", 0.7),
-        ],
-        "docker_compose": [
+        ),
+        "docker_compose": (
             Suggestion("uruchom serwisy", "docker compose up -d", "docker", 0.9),
             Suggestion("zatrzymaj serwisy", "docker compose down", "docker", 0.85),
             Suggestion("pokaż logi", "docker compose logs -f", "docker", 0.8),
             Suggestion("restart", "docker compose restart", "docker", 0.7),
-        ],
-        "python": [
+        ),
+        "python": (
             Suggestion("uruchom testy", "pytest", "python", 0.9),
             Suggestion("zainstaluj zależności", "pip install -r requirements.txt", "python", 0.85),
             Suggestion("sprawdź typy", "mypy .", "python", 0.6),
             Suggestion("formatuj kod", "black .", "python", 0.65),
-        ],
+        ),
     }
 
     # Sugestie po błędach
     ERROR_SUGGESTIONS = {
-        "permission denied": [
+        "permission denied": (
             Suggestion("uruchom z sudo", "sudo !!", "shell", 0.8),
             Suggestion("zmień uprawnienia", "chmod +x", "shell", 0.7),
-        ],
-        "command not found": [
+        ),
+        "command not found": (
             Suggestion("zainstaluj przez apt", "apt install", "shell", 0.6),
             Suggestion("zainstaluj przez pip", "pip install", "python", 0.6),
-        ],
-        "merge conflict": [
+        ),
+        "merge conflict": (
             Suggestion("pokaż konflikty", "git diff --name-only --diff-filter=U", "git", 0.9),
             Suggestion("przerwij merge", "git merge --abort", "git", 0.7),
-        ],
+        ),
+    }
+
+    # Sugestie po błędach z podniesionym score - raz, zamiast kopii przy każdym błędzie
+    _BOOSTED_ERROR_SUGGESTIONS = {
+        error_pattern: tuple(replace(s, score=s.score + 0.2) for s in error_suggestions)
+        for error_pattern, error_suggestions in ERROR_SUGGESTIONS.items()
     }
 
     def __init__(self):
         self.usage_patterns: Dict[Tuple[str, ...], UsagePattern] = {}
         self.command_frequency: Counter = Counter()
-        self.last_commands: List[str] = []
+        self.last_commands: Deque[str] = deque(maxlen=10)
+        # Model Markowa: poprzednia komenda -> licznik następnych komend
+        self._transitions: Dict[str, Counter] = defaultdict(Counter)
+        # Indeks wzorców wg pierwszej komendy (kolejność jak w usage_patterns)
+        self._patterns_by_first: Dict[str, List[UsagePattern]] = defaultdict(list)
+        # most_common(20) z command_frequency - liczone ponownie po record_command
+        self._top_frequent: Optional[List[Tuple[str, int]]] = None
+        # Prefiks (małe litery) -> pierwsze pasujące uzupełnienie ze standardowych sugestii
+        self._completion_prefixes = self._build_completion_prefixes()
+
+    def _build_completion_prefixes(self) -> Dict[str, str]:
+        """Indeks prefiksów standardowych sugestii (tekst, potem komenda)"""
+        prefixes: Dict[str, str] = {}
+        for category_suggestions in self.CONTEXT_SUGGESTIONS.values():
+            for s in category_suggestions:
+                for completion in (s.text, s.command):
+                    lowered = completion.casefold()
+                    for end in range(len(lowered) + 1):
+                        # Pierwsza sugestia w kolejności przeglądania wygrywa
+                        prefixes.setdefault(lowered[:end], completion)
+        return prefixes
 
     def get_suggestions(
         self,
@@ -153,17 +189,19 @@ class SuggestionEngine:
         if partial_input:
             candidates = self._filter_by_input(candidates, partial_input)
 
-        # Usuń duplikaty i sortuj
+        # Top-k bez duplikatów i bez sortowania całej listy (kolejność remisów jak w sorted)
+        return heapq.nlargest(
+            max_suggestions, self._unique_by_command(candidates), key=lambda s: s.score
+        )
+
+    @staticmethod
+    def _unique_by_command(candidates: List[Suggestion]) -> Iterator[Suggestion]:
+        """Pomija sugestie z komendą, która już wystąpiła (pierwsza wygrywa)"""
         seen: Set[str] = set()
-        unique_candidates = []
         for c in candidates:
             if c.command not in seen:
                 seen.add(c.command)
-                unique_candidates.append(c)
-
-        unique_candidates.sort(key=lambda s: s.score, reverse=True)
-
-        return unique_candidates[:max_suggestions]
+                yield c
 
     def _get_context_suggestions(self, context: Dict) -> List[Suggestion]:
         """Sugestie na podstawie kontekstu projektu"""
@@ -192,19 +230,9 @@ class SuggestionEngine:
         suggestions = []
         error = last_result.get("error", "").lower()
 
-        for error_pattern, error_suggestions in self.ERROR_SUGGESTIONS.items():
+        for error_pattern, boosted_suggestions in self._BOOSTED_ERROR_SUGGESTIONS.items():
             if error_pattern in error:
-                for s in error_suggestions:
-                    # Zwiększ score dla sugestii po błędach
-                    boosted = Suggestion(
-                        text=s.text,
-                        command=s.command,
-                        category=s.category,
-                        score=s.score + 0.2,
-                        description=s.description,
-                        shortcut=s.shortcut,
-                    )
-                    suggestions.append(boosted)
+                suggestions.extend(boosted_suggestions)
 
         return suggestions
 
@@ -218,20 +246,19 @@ class SuggestionEngine:
         last_cmd = self.last_commands[-1]
 
         # Znajdź wzorce zaczynające się od ostatniej komendy
-        for sequence, pattern in self.usage_patterns.items():
-            if len(sequence) > 1 and sequence[0] == last_cmd:
-                next_cmd = sequence[1]
-                # Score bazuje na częstotliwości wzorca
-                score = min(0.9, 0.5 + pattern.count * 0.1)
-                suggestions.append(
-                    Suggestion(
-                        text=f"następnie: {next_cmd}",
-                        command=next_cmd,
-                        category="wzorzec",
-                        score=score,
-                        description=f"Używane {pattern.count}x",
-                    )
+        for pattern in self._patterns_by_first.get(last_cmd, ()):
+            next_cmd = pattern.sequence[1]
+            # Score bazuje na częstotliwości wzorca
+            score = min(0.9, 0.5 + pattern.count * 0.1)
+            suggestions.append(
+                Suggestion(
+                    text=f"następnie: {next_cmd}",
+                    command=next_cmd,
+                    category="wzorzec",
+                    score=score,
+                    description=f"Używane {pattern.count}x",
                 )
+            )
 
         return suggestions
 
@@ -239,7 +266,7 @@ class SuggestionEngine:
         """Sugestie na podstawie częstotliwości użycia"""
         suggestions = []
 
-        for cmd, count in self.command_frequency.most_common(3):
+        for cmd, count in self._get_top_frequent()[:3]:
             score = min(0.7, 0.3 + count * 0.05)
             suggestions.append(
                 Suggestion(
@@ -255,39 +282,53 @@ class SuggestionEngine:
 
     def _filter_by_input(self, candidates: List[Suggestion], partial: str) -> List[Suggestion]:
         """Filtruje sugestie po częściowym wejściu"""
-        partial_lower = partial.lower()
+        partial_lower = partial.casefold()
         filtered = []
 
         for s in candidates:
             # Sprawdź czy pasuje do tekstu lub komendy
-            if partial_lower in s.text.lower() or partial_lower in s.command.lower():
-                # Zwiększ score dla dokładniejszych dopasowań
-                if s.text.lower().startswith(partial_lower):
-                    s.score += 0.1
+            if partial_lower in s._text_lower or partial_lower in s._command_lower:
+                # Zwiększ score dla dokładniejszych dopasowań (kopia - sugestie
+                # kontekstowe i po błędach są współdzielone między wywołaniami)
+                if s._text_lower.startswith(partial_lower):
+                    s = replace(s, score=s.score + 0.1)
                 filtered.append(s)
 
         return filtered
 
+    def _get_top_frequent(self) -> List[Tuple[str, int]]:
+        """20 najczęstszych komend (zapamiętane do następnego record_command)"""
+        if self._top_frequent is None:
+            self._top_frequent = self.command_frequency.most_common(20)
+        return self._top_frequent
+
     def record_command(self, command: str):
         """Zapisuje wykonaną komendę do historii"""
         # Aktualizuj częstotliwość
         self.command_frequency[command] += 1
+        self._top_frequent = None
 
         # Aktualizuj wzorce
         if self.last_commands:
-            for i in range(len(self.last_commands)):
-                sequence = tuple(self.last_commands[i:] + [command])
-                if len(sequence) <= 3:  # Max 3-elementowe sekwencje
-                    if sequence in self.usage_patterns:
-                        self.usage_patterns[sequence].count += 1
-                        self.usage_patterns[sequence].last_used = datetime.now()
-                    else:
-                        self.usage_patterns[sequence] = UsagePattern(sequence)
+            self._transitions[self.last_commands[-1]][command] += 1
+
+            # Max 3-elementowe sekwencje: trigram (jeśli jest), potem bigram
+            if len(self.last_commands) >= 2:
+                self._record_sequence((self.last_commands[-2], self.last_commands[-1], command))
+            self._record_sequence((self.last_commands[-1], command))
 
         # Aktualizuj ostatnie komendy
         self.last_commands.append(command)
-        if len(self.last_commands) > 10:
-            self.last_commands = self.last_commands[-10:]
+
+    def _record_sequence(self, sequence: Tuple[str, ...]):
+        """Zlicza wystąpienie sekwencji komend"""
+        pattern = self.usage_patterns.get(sequence)
+        if pattern is None:
+            pattern = self.usage_patterns[sequence] = UsagePattern(sequence)
+            self._patterns_by_first[sequence[0]].append(pattern)
+        else:
+            pattern.count += 1
+            pattern.last_used = datetime.now()
 
     def get_completion(self, partial: str) -> Optional[str]:
         """
@@ -299,37 +340,26 @@ class SuggestionEngine:
         Returns:
             Pełna komenda lub None
         """
-        partial_lower = partial.lower()
+        partial_lower = partial.casefold()
 
         # Szukaj w najczęściej używanych
-        for cmd, _ in self.command_frequency.most_common(20):
-            if cmd.lower().startswith(partial_lower):
+        for cmd, _ in self._get_top_frequent():
+            if cmd.casefold().startswith(partial_lower):
                 return cmd
 
-        # Szukaj w standardowych sugestiach
-        for category_suggestions in self.CONTEXT_SUGGESTIONS.values():
-            for s in category_suggestions:
-                if s.text.lower().startswith(partial_lower):
-                    return s.text
-                if s.command.lower().startswith(partial_lower):
-                    return s.command
-
-        return None
+        # Szukaj w standardowych sugestiach (jedno wyszukiwanie prefiksu)
+        return self._completion_prefixes.get(partial_lower)
 
     def get_next_likely_command(self) -> Optional[str]:
         """Przewiduje najbardziej prawdopodobną następną komendę"""
         if not self.last_commands:
             return None
 
-        last_cmd = self.last_commands[-1]
-        best_match: Optional[Tuple[str, int]] = None
-
-        for sequence, pattern in self.usage_patterns.items():
-            if sequence[0] == last_cmd and len(sequence) > 1:
-                if best_match is None or pattern.count > best_match[1]:
-                    best_match = (sequence[1], pattern.count)
+        transitions = self._transitions.get(self.last_commands[-1])
+        if not transitions:
+            return None
 
-        return best_match[0] if best_match else None
+        return transitions.most_common(1)[0][0]
 
     def format_suggestions_for_voice(self, suggestions: List[Suggestion]) -> str:
         """Formatuje sugestie do odczytu głosowego"""
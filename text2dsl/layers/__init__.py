@@ -1,11 +1,40 @@
 """Execution layers for text2dsl"""
 
-from .voice_layer import VoiceLayer, VoiceConfig, VoiceBackend, MockVoiceLayer
-from .text2make import Text2Make, MakeTarget, MakeResult
-from .text2shell import Text2Shell, ShellResult
-from .text2git import Text2Git, GitStatus, GitResult
-from .text2docker import Text2Docker, Container, DockerResult
-from .text2python import Text2Python, PythonResult
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_attrs
+
+# Warstwy ładowane leniwie (PEP 562) - import jednej warstwy nie wymaga
+# ładowania backendów głosowych ani pozostałych warstw
+_LAZY_ATTRS = {
+    "VoiceLayer": ".voice_layer",
+    "VoiceConfig": ".voice_layer",
+    "VoiceBackend": ".voice_layer",
+    "MockVoiceLayer": ".voice_layer",
+    "Text2Make": ".text2make",
+    "MakeTarget": ".text2make",
+    "MakeResult": ".text2make",
+    "Text2Shell": ".text2shell",
+    "ShellResult": ".text2shell",
+    "Text2Git": ".text2git",
+    "GitStatus": ".text2git",
+    "GitResult": ".text2git",
+    "Text2Docker": ".text2docker",
+    "Container": ".text2docker",
+    "DockerResult": ".text2docker",
+    "Text2Python": ".text2python",
+    "PythonResult": ".text2python",
+}
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
+
+if TYPE_CHECKING:
+    from .voice_layer import VoiceLayer, VoiceConfig, VoiceBackend, MockVoiceLayer
+    from .text2make import Text2Make, MakeTarget, MakeResult
+    from .text2shell import Text2Shell, ShellResult
+    from .text2git import Text2Git, GitStatus, GitResult
+    from .text2docker import Text2Docker, Container, DockerResult
+    from .text2python import Text2Python, PythonResult
 
 __all__ = [
     "VoiceLayer",
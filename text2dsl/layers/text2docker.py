@@ -13,11 +13,19 @@ from typing import List, Optional, Dict, Tuple
 from pathlib import Path
 import subprocess
 import json
+import time
 import re
 import os
 
+from ..utils.compat import DATACLASS_SLOTS
+from ..utils.text import remove_phrase
 
-@dataclass
+# Prefiksy wywołań (operacja w DockerResult to prefiks bez "docker" + argumenty)
+_DOCKER_PREFIX = ("docker",)
+_COMPOSE_PREFIX = ("docker", "compose")
+
+
+@dataclass(**DATACLASS_SLOTS)
 class Container:
     """Informacje o kontenerze"""
 
@@ -27,9 +35,14 @@ class Container:
     status: str
     ports: str = ""
     created: str = ""
+    # Czy kontener działa (status "Up ...") - liczone raz przy tworzeniu
+    running: bool = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.running = "Up" in self.status
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Image:
     """Informacje o obrazie"""
 
@@ -40,7 +53,7 @@ class Image:
     created: str
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class DockerResult:
     """Wynik operacji Docker"""
 
@@ -96,69 +109,101 @@ class Text2Docker:
         "status serwisów": "docker compose ps",
     }
 
+    # Złożone polecenia - wzorce kompilowane raz, przy definicji klasy
+    _COMPLEX_PATTERNS = [
+        (re.compile(r"(?i)zbuduj obraz (.+)"), lambda self, m: self.build(m.group(1))),
+        (re.compile(r"(?i)uruchom kontener (.+)"), lambda self, m: self.run(m.group(1))),
+        (re.compile(r"(?i)zatrzymaj kontener (.+)"), lambda self, m: self.stop(m.group(1))),
+        (re.compile(r"(?i)usuń kontener (.+)"), lambda self, m: self.remove(m.group(1))),
+        (re.compile(r"(?i)logi kontenera (.+)"), lambda self, m: self.logs(m.group(1))),
+    ]
+
+    # Jak długo (s) lista kontenerów jest aktualna - jedna interakcja to kilka odczytów
+    CONTAINERS_TTL = 1.0
+    # Jak długo (s) wynik sprawdzenia dostępności Dockera jest aktualny
+    DOCKER_PROBE_TTL = 300.0
+    # Wspólny dla instancji (warstwa jest tworzona od nowa po zmianie katalogu):
+    # (czas monotoniczny, dostępność)
+    _docker_probe: Optional[Tuple[float, bool]] = None
+    # Polecenia, które nie zmieniają stanu kontenerów (pozostałe unieważniają listę)
+    _READ_ONLY_COMMANDS = frozenset(["ps", "images", "version", "logs", "config", "inspect"])
+
     def __init__(self, working_dir: Optional[str] = None):
         self.working_dir = Path(working_dir or os.getcwd()).resolve()
-        self._has_dockerfile = (self.working_dir / "Dockerfile").exists()
+        self._has_dockerfile = os.path.exists(os.path.join(self.working_dir, "Dockerfile"))
         self._compose_file = self._find_compose_file()
+        # Ostatnie listy kontenerów: all -> (czas monotoniczny, kontenery)
+        self._containers_cache: Dict[bool, Tuple[float, List[Container]]] = {}
+        # Serwisy compose: (mtime_ns pliku compose, serwisy)
+        self._services_cache: Optional[Tuple[int, List[str]]] = None
 
     def _find_compose_file(self) -> Optional[Path]:
         """Znajduje plik docker-compose"""
+        root = str(self.working_dir)
         for name in ["docker-compose.yml", "docker-compose.yaml", "compose.yml", "compose.yaml"]:
-            path = self.working_dir / name
-            if path.exists():
-                return path
+            path = os.path.join(root, name)
+            if os.path.exists(path):
+                return Path(path)
         return None
 
-    def _run_docker(self, *args: str, timeout: int = 120) -> DockerResult:
-        """Wykonuje polecenie docker"""
-        cmd = ["docker"] + list(args)
+    def _run(self, prefix: Tuple[str, ...], args: Tuple[str, ...], timeout: int) -> DockerResult:
+        """Wykonuje polecenie docker (prefix: ("docker",) lub ("docker", "compose"))"""
+        if args and args[0] not in self._READ_ONLY_COMMANDS:
+            self._containers_cache.clear()
+        operation = " ".join(prefix[1:] + args)
 
         try:
             result = subprocess.run(
-                cmd, cwd=self.working_dir, capture_output=True, text=True, timeout=timeout
+                [*prefix, *args],
+                cwd=self.working_dir,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
             )
 
             return DockerResult(
                 success=result.returncode == 0,
                 output=result.stdout.strip(),
                 error=result.stderr.strip(),
-                operation=" ".join(args),
+                operation=operation,
             )
         except subprocess.TimeoutExpired:
-            return DockerResult(success=False, output="", error="Timeout", operation=" ".join(args))
+            return DockerResult(success=False, output="", error="Timeout", operation=operation)
         except FileNotFoundError:
             return DockerResult(
                 success=False,
                 output="",
                 error="Docker nie jest zainstalowany",
-                operation=" ".join(args),
+                operation=operation,
             )
         except Exception as e:
-            return DockerResult(success=False, output="", error=str(e), operation=" ".join(args))
+            return DockerResult(success=False, output="", error=str(e), operation=operation)
+
+    def _run_docker(self, *args: str, timeout: int = 120) -> DockerResult:
+        """Wykonuje polecenie docker"""
+        return self._run(_DOCKER_PREFIX, args, timeout)
 
     def _run_compose(self, *args: str, timeout: int = 120) -> DockerResult:
         """Wykonuje polecenie docker compose"""
-        cmd = ["docker", "compose"] + list(args)
+        return self._run(_COMPOSE_PREFIX, args, timeout)
+
+    def has_docker(self, refresh: bool = False) -> bool:
+        """
+        Sprawdza czy Docker jest dostępny (wynik zapamiętany przez DOCKER_PROBE_TTL sekund)
+
+        Args:
+            refresh: Sprawdź ponownie mimo zapamiętanego wyniku (np. po starcie demona)
+        """
+        probe = Text2Docker._docker_probe
+        if (
+            not refresh
+            and probe is not None
+            and time.monotonic() - probe[0] < self.DOCKER_PROBE_TTL
+        ):
+            return probe[1]
 
-        try:
-            result = subprocess.run(
-                cmd, cwd=self.working_dir, capture_output=True, text=True, timeout=timeout
-            )
-
-            return DockerResult(
-                success=result.returncode == 0,
-                output=result.stdout.strip(),
-                error=result.stderr.strip(),
-                operation="compose " + " ".join(args),
-            )
-        except Exception as e:
-            return DockerResult(
-                success=False, output="", error=str(e), operation="compose " + " ".join(args)
-            )
-
-    def has_docker(self) -> bool:
-        """Sprawdza czy Docker jest dostępny"""
         result = self._run_docker("version", "--format", "{{.Server.Version}}")
+        Text2Docker._docker_probe = (time.monotonic(), result.success)
         return result.success
 
     def has_dockerfile(self) -> bool:
@@ -170,11 +215,15 @@ class Text2Docker:
         return self._compose_file is not None
 
     def get_containers(self, all: bool = True) -> List[Container]:
-        """Pobiera listę kontenerów"""
+        """Pobiera listę kontenerów (zapamiętaną przez CONTAINERS_TTL sekund)"""
+        cached = self._containers_cache.get(all)
+        if cached is not None and time.monotonic() - cached[0] < self.CONTAINERS_TTL:
+            return list(cached[1])
+
         args = [
             "ps",
             "--format",
-            "{{.ID}}|{{.Names}}|{{.Image}}|{{.Status}}|{{.Ports}}|{{.CreatedAt}}",
+            "{{.ID}}\t{{.Names}}\t{{.Image}}\t{{.Status}}\t{{.Ports}}\t{{.CreatedAt}}",
         ]
         if all:
             args.insert(1, "-a")
@@ -184,57 +233,52 @@ class Text2Docker:
             return []
 
         containers = []
-        for line in result.output.split("\n"):
-            if "|" in line:
-                parts = line.split("|")
-                if len(parts) >= 4:
-                    containers.append(
-                        Container(
-                            id=parts[0][:12],
-                            name=parts[1],
-                            image=parts[2],
-                            status=parts[3],
-                            ports=parts[4] if len(parts) > 4 else "",
-                            created=parts[5] if len(parts) > 5 else "",
-                        )
-                    )
-
-        return containers
+        for line in result.output.splitlines():
+            # Pola rozdzielone tabulatorem - nie występuje w nazwach, statusie ani portach
+            parts = line.split("\t", 5)
+            if len(parts) >= 4:
+                # Brakujące opcjonalne pola (porty, data) jako puste napisy
+                parts += [""] * (6 - len(parts))
+                containers.append(Container(parts[0][:12], *parts[1:]))
+
+        self._containers_cache[all] = (time.monotonic(), containers)
+        return list(containers)
 
     def get_images(self) -> List[Image]:
         """Pobiera listę obrazów"""
         result = self._run_docker(
-            "images", "--format", "{{.ID}}|{{.Repository}}|{{.Tag}}|{{.Size}}|{{.CreatedAt}}"
+            "images", "--format", "{{.ID}}\t{{.Repository}}\t{{.Tag}}\t{{.Size}}\t{{.CreatedAt}}"
         )
 
         if not result.success:
             return []
 
         images = []
-        for line in result.output.split("\n"):
-            if "|" in line:
-                parts = line.split("|")
-                if len(parts) >= 4:
-                    images.append(
-                        Image(
-                            id=parts[0][:12],
-                            repository=parts[1],
-                            tag=parts[2],
-                            size=parts[3],
-                            created=parts[4] if len(parts) > 4 else "",
-                        )
-                    )
+        for line in result.output.splitlines():
+            parts = line.split("\t", 4)
+            if len(parts) >= 4:
+                parts += [""] * (5 - len(parts))
+                images.append(Image(parts[0][:12], *parts[1:]))
 
         return images
 
     def get_compose_services(self) -> List[str]:
-        """Pobiera listę serwisów z docker-compose"""
+        """Pobiera listę serwisów z docker-compose (ponownie tylko po zmianie pliku)"""
         if not self._compose_file:
             return []
 
+        try:
+            mtime_ns = os.stat(self._compose_file).st_mtime_ns
+        except OSError:
+            return []
+        if self._services_cache is not None and self._services_cache[0] == mtime_ns:
+            return list(self._services_cache[1])
+
         result = self._run_compose("config", "--services")
         if result.success:
-            return [s.strip() for s in result.output.split("\n") if s.strip()]
+            services = [s.strip() for s in result.output.split("\n") if s.strip()]
+            self._services_cache = (mtime_ns, services)
+            return list(services)
         return []
 
     def build(self, tag: str = "app", dockerfile: Optional[str] = None) -> DockerResult:
@@ -318,7 +362,9 @@ class Text2Docker:
 
     def execute_natural(self, natural_command: str) -> DockerResult:
         """Wykonuje naturalne polecenie Docker"""
-        natural_lower = natural_command.lower().strip()
+        # Klucze dopasowywane po casefold(), argumenty (kontenery, obrazy) z oryginału
+        natural = natural_command.strip()
+        natural_lower = natural.casefold()
 
         # Compose commands
         if self.has_compose():
@@ -335,30 +381,23 @@ class Text2Docker:
                     return self._run_compose("ps")
 
         # Proste mapowania
-        for key, cmd in self.NATURAL_COMMANDS.items():
-            if natural_lower == key or natural_lower.startswith(key + " "):
-                cmd_parts = cmd.replace("docker ", "").split()
-                rest = natural_lower.replace(key, "").strip()
-                if rest:
-                    cmd_parts.append(rest)
-
-                if "compose" in cmd:
-                    return self._run_compose(*cmd_parts[1:])
-                return self._run_docker(*cmd_parts)
+        key = self._match_natural_key(natural_lower)
+        if key is not None:
+            cmd = self.NATURAL_COMMANDS[key]
+            cmd_parts = cmd.replace("docker ", "").split()
+            rest = remove_phrase(natural, key).strip()
+            if rest:
+                cmd_parts.append(rest)
+
+            if "compose" in cmd:
+                return self._run_compose(*cmd_parts[1:])
+            return self._run_docker(*cmd_parts)
 
         # Złożone polecenia
-        patterns = [
-            (r"zbuduj obraz (.+)", lambda m: self.build(m.group(1))),
-            (r"uruchom kontener (.+)", lambda m: self.run(m.group(1))),
-            (r"zatrzymaj kontener (.+)", lambda m: self.stop(m.group(1))),
-            (r"usuń kontener (.+)", lambda m: self.remove(m.group(1))),
-            (r"logi kontenera (.+)", lambda m: self.logs(m.group(1))),
-        ]
-
-        for pattern, handler in patterns:
-            match = re.match(pattern, natural_lower)
+        for pattern, handler in self._COMPLEX_PATTERNS:
+            match = pattern.match(natural)
             if match:
-                return handler(match)
+                return handler(self, match)
 
         return DockerResult(
             success=False,
@@ -367,24 +406,39 @@ class Text2Docker:
             operation="parse",
         )
 
+    def _match_natural_key(self, natural_lower: str) -> Optional[str]:
+        """
+        Najdłuższy klucz NATURAL_COMMANDS będący całym tekstem lub jego początkiem do spacji
+
+        Sprawdza tylko prefiksy kończące się na granicy słowa (od najdłuższego),
+        więc koszt zależy od liczby słów, nie od liczby kluczy.
+        """
+        end = len(natural_lower)
+        while end > 0:
+            key = natural_lower[:end]
+            if key in self.NATURAL_COMMANDS:
+                return key
+            end = natural_lower.rfind(" ", 0, end)
+        return None
+
     def get_suggestions(self, partial: str = "") -> List[Tuple[str, str]]:
         """Generuje sugestie"""
         suggestions = []
 
-        # Kontekstowe
+        # Kontekstowe (serwisy cache'owane do zmiany pliku compose, kontenery przez CONTAINERS_TTL)
         if self.has_compose():
-            services = self.get_compose_services()
             suggestions.append(("uruchom serwisy", "docker compose up -d"))
             suggestions.append(("zatrzymaj serwisy", "docker compose down"))
-            for svc in services[:3]:
+            for svc in self.get_compose_services()[:3]:
                 suggestions.append((f"logi {svc}", f"docker compose logs {svc}"))
 
+        containers = self.get_containers()
+
         if self.has_dockerfile():
             suggestions.append(("zbuduj obraz", "docker build -t app ."))
 
-        containers = self.get_containers()
         for c in containers[:3]:
-            if "Up" in c.status:
+            if c.running:
                 suggestions.append((f"zatrzymaj {c.name}", f"docker stop {c.name}"))
                 suggestions.append((f"logi {c.name}", f"docker logs {c.name}"))
             else:
@@ -392,7 +446,7 @@ class Text2Docker:
 
         # Filtruj
         if partial:
-            suggestions = [(n, c) for n, c in suggestions if partial.lower() in n.lower()]
+            suggestions = [(n, c) for n, c in suggestions if partial.casefold() in n.casefold()]
 
         return suggestions[:10]
 
@@ -402,14 +456,14 @@ class Text2Docker:
         if not containers:
             return "Brak kontenerów."
 
-        running = [c for c in containers if "Up" in c.status]
-        stopped = [c for c in containers if "Up" not in c.status]
+        running = sum(c.running for c in containers)
+        stopped = len(containers) - running
 
         parts = []
         if running:
-            parts.append(f"{len(running)} działających kontenerów")
+            parts.append(f"{running} działających kontenerów")
         if stopped:
-            parts.append(f"{len(stopped)} zatrzymanych")
+            parts.append(f"{stopped} zatrzymanych")
 
         return ". ".join(parts) + "."
 
@@ -421,7 +475,7 @@ class Text2Docker:
 
         lines = ["┌─ Kontenery Docker ──────────────────"]
         for c in containers[:5]:
-            status = "●" if "Up" in c.status else "○"
+            status = "●" if c.running else "○"
             lines.append(f"│ {status} {c.name[:15]:15} {c.image[:20]:20}")
         lines.append("└─────────────────────────────────────")
 
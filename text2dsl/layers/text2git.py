@@ -11,12 +11,23 @@ Funkcje:
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Tuple
 from pathlib import Path
+import asyncio
 import subprocess
+import time
 import re
 import os
 
+from ..utils.compat import DATACLASS_SLOTS
+from ..utils.text import remove_phrase
 
-@dataclass
+# Argumenty 'git status' - porcelain v2 podaje gałąź i ahead/behind jako "# klucz wartość"
+_STATUS_ARGS = ("status", "--porcelain=v2", "--branch")
+
+# Liczba pól przed ścieżką w liniach wpisów porcelain v2 (zmieniony/przeniesiony/konflikt)
+_V2_PATH_FIELD = {"1": 8, "2": 9, "u": 10}
+
+
+@dataclass(**DATACLASS_SLOTS)
 class GitStatus:
     """Status repozytorium Git"""
 
@@ -29,7 +40,7 @@ class GitStatus:
     behind: int = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class GitCommit:
     """Informacje o commit"""
 
@@ -40,7 +51,7 @@ class GitCommit:
     date: str
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class GitResult:
     """Wynik operacji Git"""
 
@@ -90,11 +101,38 @@ class Text2Git:
         "schowaj": "git stash",
         "odłóż": "git stash",
     }
+    # (klucz po casefold(), klucz, komenda) - do filtrowania sugestii bez casefold() na kluczach
+    _NATURAL_LOWER = tuple(
+        (natural.casefold(), natural, bash) for natural, bash in NATURAL_COMMANDS.items()
+    )
+
+    # Złożone polecenia - wzorce kompilowane raz, przy definicji klasy
+    _COMPLEX_PATTERNS = [
+        (re.compile(r"(?i)zatwierdź z komentarzem (.+)"), lambda self, m: self.commit(m.group(1))),
+        (re.compile(r"(?i)commit (.+)"), lambda self, m: self.commit(m.group(1))),
+        (re.compile(r"(?i)przełącz na (.+)"), lambda self, m: self.checkout(m.group(1))),
+        (re.compile(r"(?i)checkout (.+)"), lambda self, m: self.checkout(m.group(1))),
+        (
+            re.compile(r"(?i)utwórz gałąź (.+)"),
+            lambda self, m: self.checkout(m.group(1), create=True),
+        ),
+        (re.compile(r"(?i)dodaj (.+)"), lambda self, m: self.add(m.group(1))),
+    ]
+
+    # Słowa-wypełniacze pomijane po poleceniu ("wypchnij zmiany" -> git push)
+    _FILLER_ARGS = frozenset(["zmiany", "changes", "änderungen"])
+
+    # Jak długo (s) status jest aktualny - zmiany w plikach roboczych nie zmieniają indeksu
+    STATUS_TTL = 1.0
+    # Polecenia, które nie zmieniają statusu (pozostałe unieważniają zapamiętany)
+    _READ_ONLY_COMMANDS = frozenset(["status", "log", "diff", "show", "rev-parse", "branch"])
 
     def __init__(self, working_dir: Optional[str] = None):
         self.working_dir = Path(working_dir or os.getcwd()).resolve()
         self._git_dir: Optional[Path] = None
         self._find_git_dir()
+        # Ostatni status: (czas monotoniczny, mtime_ns indeksu i HEAD, status)
+        self._status_cache: Optional[Tuple[float, Tuple[int, int], GitStatus]] = None
 
     def _find_git_dir(self):
         """Znajduje katalog .git"""
@@ -112,6 +150,8 @@ class Text2Git:
 
     def _run_git(self, *args: str) -> GitResult:
         """Wykonuje polecenie git"""
+        if args and args[0] not in self._READ_ONLY_COMMANDS:
+            self._status_cache = None
         cmd = ["git"] + list(args)
 
         try:
@@ -130,46 +170,124 @@ class Text2Git:
         except Exception as e:
             return GitResult(success=False, output="", error=str(e), operation=" ".join(args))
 
+    async def _run_git_async(self, *args: str) -> GitResult:
+        """Wykonuje polecenie git bez blokowania pętli zdarzeń"""
+        operation = " ".join(args)
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "git",
+                *args,
+                cwd=self.working_dir,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=60)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return GitResult(success=False, output="", error="Timeout", operation=operation)
+
+            return GitResult(
+                success=proc.returncode == 0,
+                output=stdout.decode(errors="replace").strip(),
+                error=stderr.decode(errors="replace").strip(),
+                operation=operation,
+            )
+        except Exception as e:
+            return GitResult(success=False, output="", error=str(e), operation=operation)
+
     def get_status(self) -> Optional[GitStatus]:
         """Pobiera status repozytorium"""
         if not self.is_repo():
             return None
 
-        # Pobierz gałąź
-        branch_result = self._run_git("branch", "--show-current")
-        branch = branch_result.output if branch_result.success else "unknown"
+        cached = self._get_cached_status()
+        if cached is not None:
+            return cached
+
+        # Gałąź jest w nagłówku "# branch.head" - jeden proces git zamiast dwóch
+        return self._store_status(self._parse_status(self._run_git(*_STATUS_ARGS)))
+
+    async def get_status_async(self) -> Optional[GitStatus]:
+        """Pobiera status repozytorium bez blokowania pętli zdarzeń"""
+        if not self.is_repo():
+            return None
 
-        # Pobierz status
-        status_result = self._run_git("status", "--porcelain", "-b")
+        cached = self._get_cached_status()
+        if cached is not None:
+            return cached
+
+        status_result = await self._run_git_async(*_STATUS_ARGS)
+        return self._store_status(self._parse_status(status_result))
+
+    def _status_key(self) -> Tuple[int, int]:
+        """mtime_ns indeksu i HEAD - zmieniają się przy add/commit/checkout"""
+        key = []
+        for name in ("index", "HEAD"):
+            try:
+                key.append(os.stat(os.path.join(self._git_dir, name)).st_mtime_ns)
+            except OSError:
+                key.append(0)
+        return key[0], key[1]
+
+    def _get_cached_status(self) -> Optional[GitStatus]:
+        """Zapamiętany status, jeśli młodszy niż STATUS_TTL i repozytorium się nie zmieniło"""
+        cached = self._status_cache
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < self.STATUS_TTL
+            and cached[1] == self._status_key()
+        ):
+            return cached[2]
+        return None
+
+    def _store_status(self, status: Optional[GitStatus]) -> Optional[GitStatus]:
+        """Zapamiętuje status (klucz liczony po git status, który może odświeżyć indeks)"""
+        if status is not None:
+            self._status_cache = (time.monotonic(), self._status_key(), status)
+        return status
+
+    def _parse_status(self, status_result: GitResult) -> Optional[GitStatus]:
+        """Buduje GitStatus z wyniku 'git status --porcelain=v2 --branch'"""
         if not status_result.success:
             return None
 
+        branch = "unknown"
+
         staged = []
         modified = []
         untracked = []
         ahead = behind = 0
 
         for line in status_result.output.split("\n"):
-            if line.startswith("##"):
-                # Parsuj ahead/behind
-                if "ahead" in line:
-                    match = re.search(r"ahead (\d+)", line)
-                    if match:
-                        ahead = int(match.group(1))
-                if "behind" in line:
-                    match = re.search(r"behind (\d+)", line)
-                    if match:
-                        behind = int(match.group(1))
-            elif len(line) >= 3:
-                status_code = line[:2]
-                filename = line[3:]
+            kind = line[:1]
+            if kind == "#":
+                # "# branch.head main", "# branch.ab +1 -2"
+                key, _, value = line[2:].partition(" ")
+                if key == "branch.head":
+                    # Pusty napis dla odłączonego HEAD - jak 'git branch --show-current'
+                    branch = "" if value == "(detached)" else value
+                elif key == "branch.ab":
+                    ahead_str, _, behind_str = value.partition(" ")
+                    ahead = int(ahead_str[1:] or 0)
+                    behind = int(behind_str[1:] or 0)
+            elif kind == "?":
+                untracked.append(line[2:])
+            elif kind in _V2_PATH_FIELD:
+                path_field = _V2_PATH_FIELD[kind]
+                fields = line.split(" ", path_field)
+                if len(fields) <= path_field:
+                    continue
+                status_code = fields[1]
+                # Przeniesienia: "nowa<TAB>stara" - liczy się nowa ścieżka
+                filename = fields[-1].split("\t", 1)[0]
 
                 if status_code[0] in "MADRC":
                     staged.append(filename)
                 if status_code[1] == "M":
                     modified.append(filename)
-                if status_code == "??":
-                    untracked.append(filename)
 
         return GitStatus(
             branch=branch,
@@ -188,6 +306,11 @@ class Text2Git:
         else:
             result = self._run_git("branch")
 
+        return self._parse_branches(result)
+
+    @staticmethod
+    def _parse_branches(result: GitResult) -> List[str]:
+        """Buduje listę gałęzi z wyniku 'git branch'"""
         if not result.success:
             return []
 
@@ -201,8 +324,16 @@ class Text2Git:
 
     def get_log(self, n: int = 10) -> List[GitCommit]:
         """Pobiera historię commitów"""
-        result = self._run_git("log", f"-{n}", "--pretty=format:%H|%h|%s|%an|%ad", "--date=short")
+        return self._parse_log(self._run_git(*self._log_args(n)))
 
+    @staticmethod
+    def _log_args(n: int) -> Tuple[str, ...]:
+        """Argumenty 'git log' dla n ostatnich commitów (pola rozdzielone |)"""
+        return ("log", f"-{n}", "--pretty=format:%H|%h|%s|%an|%ad", "--date=short")
+
+    @staticmethod
+    def _parse_log(result: GitResult) -> List[GitCommit]:
+        """Buduje listę commitów z wyniku 'git log'"""
         if not result.success:
             return []
 
@@ -223,6 +354,27 @@ class Text2Git:
 
         return commits
 
+    async def get_overview_async(
+        self, n: int = 10
+    ) -> Tuple[Optional[GitStatus], List[str], List[GitCommit]]:
+        """
+        Pobiera status, gałęzie i historię równolegle
+
+        Trzy niezależne procesy git - czas to najwolniejsze z wywołań, nie ich suma.
+
+        Returns:
+            (status, gałęzie, ostatnie n commitów)
+        """
+        if not self.is_repo():
+            return None, [], []
+
+        status, branches_result, log_result = await asyncio.gather(
+            self.get_status_async(),
+            self._run_git_async("branch"),
+            self._run_git_async(*self._log_args(n)),
+        )
+        return status, self._parse_branches(branches_result), self._parse_log(log_result)
+
     def add(self, *paths: str) -> GitResult:
         """Dodaje pliki do staged"""
         if not paths:
@@ -261,41 +413,28 @@ class Text2Git:
 
     def execute_natural(self, natural_command: str) -> GitResult:
         """Wykonuje naturalne polecenie Git"""
-        natural_lower = natural_command.lower().strip()
-
-        filler_args = {
-            "zmiany",
-            "changes",
-            "änderungen",
-        }
+        # Klucze dopasowywane po casefold(), argumenty (gałęzie, opisy commitów) z oryginału
+        natural = natural_command.strip()
+        natural_lower = natural.casefold()
 
         # Sprawdź proste mapowania
-        for key, cmd in self.NATURAL_COMMANDS.items():
-            if natural_lower == key or natural_lower.startswith(key + " "):
-                args = cmd.replace("git ", "").split()
-                rest = natural_lower.replace(key, "").strip()
-                if rest and rest not in filler_args:
-                    args.append(rest)
-                return self._run_git(*args)
+        key = self._match_natural_key(natural_lower)
+        if key is not None:
+            args = self.NATURAL_COMMANDS[key].replace("git ", "").split()
+            rest = remove_phrase(natural, key).strip()
+            if rest and rest.casefold() not in self._FILLER_ARGS:
+                args.append(rest)
+            return self._run_git(*args)
 
         # Parsuj złożone polecenia
-        patterns = [
-            (r"zatwierdź z komentarzem (.+)", lambda m: self.commit(m.group(1))),
-            (r"commit (.+)", lambda m: self.commit(m.group(1))),
-            (r"przełącz na (.+)", lambda m: self.checkout(m.group(1))),
-            (r"checkout (.+)", lambda m: self.checkout(m.group(1))),
-            (r"utwórz gałąź (.+)", lambda m: self.checkout(m.group(1), create=True)),
-            (r"dodaj (.+)", lambda m: self.add(m.group(1))),
-        ]
-
-        for pattern, handler in patterns:
-            match = re.match(pattern, natural_lower)
+        for pattern, handler in self._COMPLEX_PATTERNS:
+            match = pattern.match(natural)
             if match:
-                return handler(match)
+                return handler(self, match)
 
         # Fallback - spróbuj wykonać jako surowe polecenie git
         if natural_lower.startswith("git "):
-            args = natural_lower.replace("git ", "").split()
+            args = natural[4:].split()
             return self._run_git(*args)
 
         return GitResult(
@@ -305,6 +444,20 @@ class Text2Git:
             operation="parse",
         )
 
+    def _match_natural_key(self, natural_lower: str) -> Optional[str]:
+        """
+        Najdłuższy klucz NATURAL_COMMANDS będący całym tekstem lub jego początkiem do spacji
+
+        "dodaj wszystko" trafia w "dodaj wszystko", nie w krótsze "dodaj".
+        """
+        end = len(natural_lower)
+        while end > 0:
+            key = natural_lower[:end]
+            if key in self.NATURAL_COMMANDS:
+                return key
+            end = natural_lower.rfind(" ", 0, end)
+        return None
+
     def get_suggestions(self, partial: str = "") -> List[Tuple[str, str]]:
         """Generuje sugestie"""
         suggestions = []
@@ -322,15 +475,19 @@ class Text2Git:
                 suggestions.append(("pobierz", f"git pull ({status.behind} behind)"))
 
         # Ogólne sugestie
-        for natural, bash in self.NATURAL_COMMANDS.items():
-            if not partial or partial.lower() in natural.lower():
-                suggestions.append((natural, bash))
+        partial_lower = partial.casefold()
+        suggestions.extend(
+            (natural, bash)
+            for natural_lower, natural, bash in self._NATURAL_LOWER
+            if partial_lower in natural_lower
+        )
 
         return suggestions[:10]
 
-    def format_status_for_voice(self) -> str:
-        """Formatuje status do odczytu głosowego"""
-        status = self.get_status()
+    def format_status_for_voice(self, status: Optional[GitStatus] = None) -> str:
+        """Formatuje status do odczytu głosowego (status - już pobrany, by nie wołać git)"""
+        if status is None:
+            status = self.get_status()
         if not status:
             return "To nie jest repozytorium Git."
 
@@ -353,9 +510,10 @@ class Text2Git:
 
         return " ".join(parts)
 
-    def format_status_for_display(self) -> str:
-        """Formatuje status do wyświetlenia"""
-        status = self.get_status()
+    def format_status_for_display(self, status: Optional[GitStatus] = None) -> str:
+        """Formatuje status do wyświetlenia (status - już pobrany, by nie wołać git)"""
+        if status is None:
+            status = self.get_status()
         if not status:
             return "Nie jesteś w repozytorium Git."
 
@@ -9,14 +9,23 @@ Funkcje:
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Final, FrozenSet, List, Mapping, Optional, Dict, Any, Tuple
 from pathlib import Path
 import subprocess
+import threading
+import logging
+import mmap
 import re
 import os
 
+from ..utils.compat import DATACLASS_SLOTS
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+@dataclass(**DATACLASS_SLOTS)
 class MakeTarget:
     """Cel w Makefile"""
 
@@ -27,7 +36,7 @@ class MakeTarget:
     line_number: int = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class MakeResult:
     """Wynik wykonania make"""
 
@@ -72,70 +81,133 @@ class Text2Make:
         "docs": ["docs", "doc", "documentation"],
     }
 
+    # Wyrażenia na bajtach - Makefile jest mapowany w pamięci bez dekodowania całości
+    _PHONY_RE = re.compile(rb"\.PHONY:\s*(.+)")
+    # Linia komentarza albo linia celu "nazwa: zależności"
+    _LINE_RE = re.compile(
+        rb"^(?:[ \t\r\f\v]*#.*|([a-zA-Z_][a-zA-Z0-9_-]*)[ \t\r\f\v]*:(.*))$", re.MULTILINE
+    )
+
     def __init__(self, working_dir: Optional[str] = None):
         self.working_dir = Path(working_dir or os.getcwd()).resolve()
         self.makefile_path: Optional[Path] = None
-        self.targets: Dict[str, MakeTarget] = {}
-        self.phony_targets: set = set()
+        self._targets: Dict[str, MakeTarget] = {}
+        self._phony_targets: set = set()
+        # (mtime_ns, rozmiar) Makefile z ostatniego parsowania
+        # (parsowanie odroczone do pierwszego użycia celów - run() go nie potrzebuje)
+        self._parsed_key: Optional[Tuple[int, int]] = None
+        self._parse_lock = threading.Lock()
 
         self._find_makefile()
-        if self.makefile_path:
-            self._parse_makefile()
+
+    @property
+    def targets(self) -> Dict[str, MakeTarget]:
+        """Cele z Makefile (parsowane przy pierwszym dostępie i po zmianie pliku)"""
+        self._ensure_parsed()
+        return self._targets
+
+    @property
+    def phony_targets(self) -> set:
+        """Cele .PHONY (parsowane przy pierwszym dostępie i po zmianie pliku)"""
+        self._ensure_parsed()
+        return self._phony_targets
 
     def _find_makefile(self):
         """Znajduje Makefile w katalogu"""
+        root = str(self.working_dir)
         for name in ["Makefile", "makefile", "GNUmakefile"]:
-            path = self.working_dir / name
-            if path.exists():
-                self.makefile_path = path
+            path = os.path.join(root, name)
+            if os.path.exists(path):
+                self.makefile_path = Path(path)
                 break
 
-    def _parse_makefile(self):
-        """Parsuje Makefile"""
+    def _ensure_parsed(self):
+        """Parsuje Makefile (ponownie tylko gdy plik zmienił się od ostatniego parsowania)"""
         if not self.makefile_path:
             return
 
-        try:
-            content = self.makefile_path.read_text()
-            lines = content.split("\n")
+        with self._parse_lock:
+            try:
+                st = self.makefile_path.stat()
+            except OSError:
+                # Makefile usunięty - nie zwracaj celów ze starego parsowania
+                self._clear_targets()
+                return
+            key = (st.st_mtime_ns, st.st_size)
+            if key == self._parsed_key:
+                return
+
+            try:
+                targets, phony_targets = self._parse_cached(str(self.makefile_path), key)
+            except Exception as e:
+                logger.warning("Błąd parsowania Makefile %s: %s", self.makefile_path, e)
+                self._clear_targets()
+                return
+
+            self._targets = dict(targets)
+            self._phony_targets = set(phony_targets)
+            self._parsed_key = key
+
+    def _clear_targets(self):
+        self._targets = {}
+        self._phony_targets = set()
+        self._parsed_key = None
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _parse_cached(
+        cls, path: str, key: Tuple[int, int]
+    ) -> Tuple[Dict[str, MakeTarget], FrozenSet[str]]:
+        """
+        Parsuje Makefile - cache po (ścieżka, (mtime_ns, rozmiar))
+
+        Wspólny dla instancji: warstwa jest tworzona od nowa po zmianie katalogu,
+        a niezmieniony Makefile nie jest wtedy czytany ponownie.
+        """
+        targets: Dict[str, MakeTarget] = {}
+        phony_targets: FrozenSet[str] = frozenset()
+
+        if key[1] == 0:
+            return targets, phony_targets
 
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
             # Znajdź cele .PHONY
-            phony_match = re.search(r"\.PHONY:\s*(.+)", content)
+            phony_match = cls._PHONY_RE.search(mm)
             if phony_match:
-                self.phony_targets = set(phony_match.group(1).split())
+                phony_targets = frozenset(phony_match.group(1).decode(errors="replace").split())
 
             current_description = None
+            line_number, pos = 1, 0
+
+            for match in cls._LINE_RE.finditer(mm):
+                line_number += mm[pos : match.start()].count(b"\n")
+                pos = match.start()
 
-            for i, line in enumerate(lines):
                 # Komentarz z opisem (przed celem)
-                if line.strip().startswith("#"):
-                    desc = line.strip("#").strip()
+                if match.group(1) is None:
+                    desc = match.group(0).decode(errors="replace").strip("#").strip()
                     if desc and not desc.startswith("!"):
                         current_description = desc
                     continue
 
-                # Cel
-                match = re.match(r"^([a-zA-Z_][a-zA-Z0-9_-]*)\s*:\s*(.*)?$", line)
-                if match:
-                    target_name = match.group(1)
-                    deps_str = match.group(2) or ""
-                    deps = [d.strip() for d in deps_str.split() if d.strip()]
-
-                    # Pomijaj cele specjalne i zmienne
-                    if target_name.startswith(".") or "=" in line:
-                        current_description = None
-                        continue
-
-                    self.targets[target_name] = MakeTarget(
-                        name=target_name,
-                        dependencies=deps,
-                        description=current_description,
-                        is_phony=target_name in self.phony_targets,
-                        line_number=i + 1,
-                    )
+                # Cel - pomijaj zmienne (VAR := ...)
+                if b"=" in match.group(0):
                     current_description = None
-        except Exception as e:
-            print(f"Błąd parsowania Makefile: {e}")
+                    continue
+
+                target_name = match.group(1).decode("ascii")
+                deps = match.group(2).decode(errors="replace").split()
+
+                targets[target_name] = MakeTarget(
+                    name=target_name,
+                    dependencies=deps,
+                    description=current_description,
+                    is_phony=target_name in phony_targets,
+                    line_number=line_number,
+                )
+                current_description = None
+
+        return targets, phony_targets
 
     def get_targets(self) -> List[MakeTarget]:
         """Zwraca listę celów"""
@@ -155,20 +227,24 @@ class Text2Make:
         Returns:
             Nazwa celu lub None
         """
-        command_lower = command.lower()
-
-        # Sprawdź bezpośrednie dopasowanie
-        if command_lower in self.targets:
+        command_lower = command.casefold()
+        targets = self.targets
+
+        # Sprawdź bezpośrednie dopasowanie (nazwy celów rozróżniają wielkość liter -
+        # najpierw nazwa w oryginalnej postaci)
+        if command in targets:
+            return command
+        if command_lower in targets:
             return command_lower
 
         # Sprawdź mapowanie
         if command_lower in self.NATURAL_COMMANDS:
             for candidate in self.NATURAL_COMMANDS[command_lower]:
-                if candidate in self.targets:
+                if candidate in targets:
                     return candidate
 
         # Fuzzy matching
-        for target_name in self.targets:
+        for target_name in targets:
             if command_lower in target_name or target_name in command_lower:
                 return target_name
 
@@ -259,14 +335,15 @@ class Text2Make:
             Lista (nazwa, opis) sugestii
         """
         suggestions = []
+        phony_targets = self.phony_targets
 
         for target in self.targets.values():
-            if not partial or partial.lower() in target.name.lower():
+            if not partial or partial.casefold() in target.name.casefold():
                 desc = target.description or f"Cel: {target.name}"
                 suggestions.append((target.name, desc))
 
         # Sortuj - najpierw phony (częściej używane), potem alfabetycznie
-        suggestions.sort(key=lambda x: (0 if x[0] in self.phony_targets else 1, x[0]))
+        suggestions.sort(key=lambda x: (0 if x[0] in phony_targets else 1, x[0]))
 
         return suggestions[:10]
 
@@ -280,21 +357,20 @@ class Text2Make:
         Returns:
             Słownik {cel: [zależności]}
         """
+        targets = self.targets
         tree = {}
-        visited = set()
-
-        def collect(name: str):
-            if name in visited or name not in self.targets:
-                return
-            visited.add(name)
-
-            t = self.targets[name]
+        # Iteracyjny DFS (pre-order) - ta sama kolejność co rekurencja, bez limitu głębokości
+        stack = [target]
+        while stack:
+            name = stack.pop()
+            if name in tree:
+                continue
+            t = targets.get(name)
+            if t is None:
+                continue
             tree[name] = t.dependencies
+            stack.extend(reversed(t.dependencies))
 
-            for dep in t.dependencies:
-                collect(dep)
-
-        collect(target)
         return tree
 
     def format_targets_for_voice(self) -> str:
@@ -314,9 +390,10 @@ class Text2Make:
         if not self.targets:
             return "Brak Makefile lub pusty Makefile."
 
+        phony_targets = self.phony_targets
         lines = ["┌─ Cele Makefile ─────────────────────┐"]
         for name, desc in self.get_suggestions():
-            phony = "●" if name in self.phony_targets else "○"
+            phony = "●" if name in phony_targets else "○"
             lines.append(f"│ {phony} {name:15} {desc[:25]}")
         lines.append("└──────────────────────────────────────┘")
 
@@ -327,10 +404,9 @@ class Text2Make:
         return self.makefile_path is not None
 
 
-class MakefileGenerator:
-    """Generator Makefile z naturalnego opisu"""
-
-    TEMPLATES = {
+# Szablony Makefile - niezmienne, współdzielone przez generate_makefile i MakefileGenerator
+_TEMPLATES: Final[Mapping[str, str]] = MappingProxyType(
+    {
         "python": """
 .PHONY: all install test lint clean run
 
@@ -390,8 +466,17 @@ clean:
 \t@echo "Cleaning..."
 """,
     }
+)
+_DEFAULT_TEMPLATE: Final[str] = _TEMPLATES["basic"]
 
-    @classmethod
-    def generate(cls, project_type: str = "basic") -> str:
-        """Generuje Makefile dla typu projektu"""
-        return cls.TEMPLATES.get(project_type, cls.TEMPLATES["basic"])
+
+def generate_makefile(project_type: str = "basic") -> str:
+    """Generuje Makefile dla typu projektu (nieznany typ = "basic")"""
+    return _TEMPLATES.get(project_type, _DEFAULT_TEMPLATE)
+
+
+class MakefileGenerator:
+    """Generator Makefile z naturalnego opisu (zgodność wsteczna - patrz generate_makefile)"""
+
+    TEMPLATES = _TEMPLATES
+    generate = staticmethod(generate_makefile)
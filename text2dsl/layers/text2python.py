@@ -11,6 +11,7 @@ Funkcje:
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Tuple
 from pathlib import Path
+import asyncio
 import subprocess
 import sys
 import re
@@ -76,6 +77,21 @@ class Text2Python:
         "utwórz venv": "python -m venv venv",
         "aktywuj venv": "source venv/bin/activate",
     }
+    # (klucz po casefold(), klucz, komenda) - do filtrowania sugestii bez casefold() na kluczach
+    _NATURAL_LOWER = tuple(
+        (natural.casefold(), natural, bash) for natural, bash in NATURAL_COMMANDS.items()
+    )
+
+    # Złożone polecenia - wzorce kompilowane raz, przy definicji klasy
+    _COMPLEX_PATTERNS = [
+        (re.compile(r"(?i)uruchom (.+\.py)"), lambda self, m: self.run_script(m.group(1))),
+        (re.compile(r"(?i)run (.+\.py)"), lambda self, m: self.run_script(m.group(1))),
+        (re.compile(r"(?i)zainstaluj (.+)"), lambda self, m: self.install(*m.group(1).split())),
+        (re.compile(r"(?i)install (.+)"), lambda self, m: self.install(*m.group(1).split())),
+        (re.compile(r"(?i)odinstaluj (.+)"), lambda self, m: self.uninstall(*m.group(1).split())),
+        (re.compile(r"(?i)testy (.+)"), lambda self, m: self.pytest(m.group(1))),
+        (re.compile(r"(?i)formatuj (.+)"), lambda self, m: self.black(m.group(1))),
+    ]
 
     def __init__(self, working_dir: Optional[str] = None):
         self.working_dir = Path(working_dir or os.getcwd()).resolve()
@@ -87,12 +103,13 @@ class Text2Python:
 
     def _find_venv(self):
         """Znajduje środowisko wirtualne"""
+        root = str(self.working_dir)
         for venv_name in ["venv", ".venv", "env", ".env"]:
-            venv_path = self.working_dir / venv_name
-            python_path = venv_path / "bin" / "python"
-            if python_path.exists():
-                self._venv_path = venv_path
-                self._python_path = python_path
+            venv_path = os.path.join(root, venv_name)
+            python_path = os.path.join(venv_path, "bin", "python")
+            if os.path.exists(python_path):
+                self._venv_path = Path(venv_path)
+                self._python_path = Path(python_path)
                 break
 
     def _detect_python(self):
@@ -131,6 +148,45 @@ class Text2Python:
                 success=False, output="", error=str(e), operation=" ".join(args), return_code=-1
             )
 
+    async def _run_python_async(self, *args: str, timeout: int = 300) -> PythonResult:
+        """Wykonuje polecenie Python bez blokowania pętli zdarzeń"""
+        operation = " ".join(args)
+
+        env = os.environ.copy()
+        if self._venv_path:
+            env["VIRTUAL_ENV"] = str(self._venv_path)
+            env["PATH"] = f"{self._venv_path / 'bin'}:{env.get('PATH', '')}"
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                str(self._python_path),
+                *args,
+                cwd=self.working_dir,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return PythonResult(
+                    success=False, output="", error="Timeout", operation=operation, return_code=-1
+                )
+
+            return PythonResult(
+                success=proc.returncode == 0,
+                output=stdout.decode(errors="replace").strip(),
+                error=stderr.decode(errors="replace").strip(),
+                operation=operation,
+                return_code=proc.returncode or 0,
+            )
+        except Exception as e:
+            return PythonResult(
+                success=False, output="", error=str(e), operation=operation, return_code=-1
+            )
+
     def _run_pip(self, *args: str, timeout: int = 120) -> PythonResult:
         """Wykonuje polecenie pip"""
         return self._run_python("-m", "pip", *args, timeout=timeout)
@@ -179,6 +235,11 @@ class Text2Python:
         result = self._run_python("--version")
         return result.output if result.success else "unknown"
 
+    async def get_python_version_async(self) -> str:
+        """Pobiera wersję Python (asynchronicznie)"""
+        result = await self._run_python_async("--version")
+        return result.output if result.success else "unknown"
+
     def get_packages(self) -> List[Package]:
         """Pobiera listę zainstalowanych pakietów"""
         result = self._run_pip("list", "--format", "json")
@@ -277,7 +338,9 @@ class Text2Python:
 
     def execute_natural(self, natural_command: str) -> PythonResult:
         """Wykonuje naturalne polecenie Python"""
-        natural_lower = natural_command.lower().strip()
+        # Klucze dopasowywane po casefold(), argumenty (skrypty, pakiety) z oryginału
+        natural = natural_command.strip()
+        natural_lower = natural.casefold()
 
         # Proste mapowania
         for key, cmd in self.NATURAL_COMMANDS.items():
@@ -297,24 +360,14 @@ class Text2Python:
                     return self._run_python(*parts)
 
         # Złożone polecenia
-        patterns = [
-            (r"uruchom (.+\.py)", lambda m: self.run_script(m.group(1))),
-            (r"run (.+\.py)", lambda m: self.run_script(m.group(1))),
-            (r"zainstaluj (.+)", lambda m: self.install(*m.group(1).split())),
-            (r"install (.+)", lambda m: self.install(*m.group(1).split())),
-            (r"odinstaluj (.+)", lambda m: self.uninstall(*m.group(1).split())),
-            (r"testy (.+)", lambda m: self.pytest(m.group(1))),
-            (r"formatuj (.+)", lambda m: self.black(m.group(1))),
-        ]
-
-        for pattern, handler in patterns:
-            match = re.match(pattern, natural_lower)
+        for pattern, handler in self._COMPLEX_PATTERNS:
+            match = pattern.match(natural)
             if match:
-                return handler(match)
+                return handler(self, match)
 
         # Fallback - spróbuj wykonać jako polecenie Python
         if natural_lower.endswith(".py"):
-            return self.run_script(natural_lower)
+            return self.run_script(natural)
 
         return PythonResult(
             success=False,
@@ -334,22 +387,32 @@ class Text2Python:
         else:
             suggestions.append(("aktywne venv", str(self._venv_path)))
 
-        # Pliki w projekcie
-        if (self.working_dir / "requirements.txt").exists():
+        # Pliki w projekcie - jeden odczyt katalogu zamiast osobnych stat() i glob()
+        try:
+            with os.scandir(self.working_dir) as it:
+                entries = {e.name: e for e in it}
+        except OSError:
+            entries = {}
+
+        if "requirements.txt" in entries:
             suggestions.append(("zainstaluj wymagania", "pip install -r requirements.txt"))
 
-        if (self.working_dir / "setup.py").exists() or (
-            self.working_dir / "pyproject.toml"
-        ).exists():
+        if "setup.py" in entries or "pyproject.toml" in entries:
             suggestions.append(("zainstaluj projekt", "pip install -e ."))
 
-        if (self.working_dir / "tests").is_dir() or list(self.working_dir.glob("test_*.py")):
+        tests_entry = entries.get("tests")
+        if (tests_entry is not None and tests_entry.is_dir()) or any(
+            name.startswith("test_") and name.endswith(".py") for name in entries
+        ):
             suggestions.append(("uruchom testy", "pytest"))
 
         # Ogólne
-        for natural, bash in self.NATURAL_COMMANDS.items():
-            if not partial or partial.lower() in natural.lower():
-                suggestions.append((natural, bash))
+        partial_lower = partial.casefold()
+        suggestions.extend(
+            (natural, bash)
+            for natural_lower, natural, bash in self._NATURAL_LOWER
+            if partial_lower in natural_lower
+        )
 
         return suggestions[:10]
 
@@ -8,14 +8,52 @@ Funkcje:
 - Sugestie kontekstowe
 """
 
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple, Callable
+from functools import lru_cache
+from itertools import islice
+from typing import Deque, List, Optional, Dict, Any, Tuple, Callable
 from pathlib import Path
 import subprocess
+import shutil
 import shlex
 import re
 import os
 
+from ..utils.text import remove_phrase
+
+# Znaki wymagające interpretera powłoki (potoki, przekierowania, zmienne, globy...)
+_SHELL_METACHARS = frozenset("|&;<>()$`\\*?~{}[]#!\n")
+
+# Wbudowane polecenia powłoki - nie da się ich uruchomić jako osobnego procesu
+# (część ma też wersję w PATH, np. /usr/bin/cd, która nie zmienia stanu powłoki)
+_SHELL_BUILTINS = frozenset(
+    ["cd", "source", ".", "export", "unset", "set", "alias", "eval", "exec", "exit", "umask"]
+)
+
+
+@lru_cache(maxsize=256)
+def _split_simple_command(command: str) -> Optional[Tuple[str, ...]]:
+    """
+    Dzieli proste polecenie na argv
+
+    Returns:
+        Krotka argumentów lub None, gdy polecenie wymaga powłoki
+        (także gdy programu nie ma w PATH - może to być wbudowane polecenie,
+        np. command, type, ulimit, read)
+    """
+    if _SHELL_METACHARS.intersection(command):
+        return None
+    try:
+        argv = tuple(shlex.split(command))
+    except ValueError:
+        return None
+    if not argv or argv[0] in _SHELL_BUILTINS or "=" in argv[0]:
+        return None
+    if shutil.which(argv[0]) is None:
+        return None
+    return argv
+
 
 @dataclass
 class ShellResult:
@@ -63,6 +101,10 @@ class Text2Shell:
         "pokaż plik": "cat",
         "ostatnie linie": "tail -n 20",
     }
+    # (klucz po casefold(), klucz, komenda) - do filtrowania sugestii bez casefold() na kluczach
+    _NATURAL_LOWER = tuple(
+        (natural.casefold(), natural, bash) for natural, bash in NATURAL_COMMANDS.items()
+    )
 
     # Niebezpieczne wzorce (blokowane)
     DANGEROUS_PATTERNS = [
@@ -71,20 +113,19 @@ class Text2Shell:
         r":\(\)\{\s*:\|:\s*&\s*\};:",
         r"dd\s+if=/dev/zero\s+of=/dev/sd",
     ]
+    # Jedna alternacja zamiast osobnego search() dla każdego wzorca
+    _DANGEROUS_RE = re.compile("|".join(f"(?:{p})" for p in DANGEROUS_PATTERNS))
 
     def __init__(self, working_dir: Optional[str] = None, timeout: int = 60):
         self.working_dir = Path(working_dir or os.getcwd()).resolve()
         self.timeout = timeout
-        self.history: List[ShellResult] = []
+        self.history: Deque[ShellResult] = deque(maxlen=100)
         self.aliases: Dict[str, ShellAlias] = {}
         self.env: Dict[str, str] = {}
         self._confirm_callback: Optional[Callable[[str], bool]] = None
 
     def _is_dangerous(self, command: str) -> bool:
-        for pattern in self.DANGEROUS_PATTERNS:
-            if re.search(pattern, command):
-                return True
-        return False
+        return self._DANGEROUS_RE.search(command) is not None
 
     def run(self, command: str, capture: bool = True, shell: bool = True) -> ShellResult:
         """Wykonuje komendę shell"""
@@ -108,12 +149,15 @@ class Text2Shell:
         run_env = os.environ.copy()
         run_env.update(self.env)
 
+        # Proste polecenia bez /bin/sh - jeden fork+exec mniej
+        argv = _split_simple_command(command) if shell else None
+
         start_time = time.time()
 
         try:
             result = subprocess.run(
-                command,
-                shell=shell,
+                list(argv) if argv else command,
+                shell=shell and argv is None,
                 cwd=self.working_dir,
                 capture_output=capture,
                 text=True,
@@ -143,6 +187,36 @@ class Text2Shell:
                 return_code=-1,
                 command=command,
             )
+        except FileNotFoundError as e:
+            # Bez powłoki brak programu zgłaszany jest wyjątkiem, nie kodem 127
+            if argv and e.filename == argv[0]:
+                return ShellResult(
+                    success=False,
+                    output="",
+                    error=f"{argv[0]}: command not found",
+                    return_code=127,
+                    command=command,
+                )
+            if not self.working_dir.is_dir():
+                error = f"Katalog roboczy nie istnieje: {self.working_dir}"
+            else:
+                error = str(e)
+            return ShellResult(
+                success=False, output="", error=error, return_code=-1, command=command
+            )
+        except PermissionError as e:
+            # Plik bez prawa wykonania - jak w powłoce kod 126
+            if argv and e.filename == argv[0]:
+                return ShellResult(
+                    success=False,
+                    output="",
+                    error=f"{argv[0]}: Permission denied",
+                    return_code=126,
+                    command=command,
+                )
+            return ShellResult(
+                success=False, output="", error=str(e), return_code=-1, command=command
+            )
         except Exception as e:
             return ShellResult(
                 success=False, output="", error=str(e), return_code=-1, command=command
@@ -150,14 +224,15 @@ class Text2Shell:
 
     def translate_to_bash(self, natural: str) -> str:
         """Tłumaczy naturalne polecenie na bash"""
-        natural_lower = natural.lower().strip()
+        # Klucze dopasowywane po casefold(), argumenty (np. nazwy plików) z oryginału
+        natural_lower = natural.casefold().strip()
 
         if natural_lower in self.NATURAL_COMMANDS:
             return self.NATURAL_COMMANDS[natural_lower]
 
         for key, cmd in self.NATURAL_COMMANDS.items():
             if key in natural_lower:
-                rest = natural_lower.replace(key, "").strip()
+                rest = remove_phrase(natural, key).strip()
                 if rest:
                     return f"{cmd} {rest}"
                 return cmd
@@ -189,13 +264,16 @@ class Text2Shell:
     def get_suggestions(self, partial: str = "") -> List[Tuple[str, str]]:
         suggestions = []
 
-        for result in reversed(self.history[-20:]):
-            if result.success and (not partial or partial.lower() in result.command.lower()):
+        for result in islice(reversed(self.history), 20):
+            if result.success and (not partial or partial.casefold() in result.command.casefold()):
                 suggestions.append((result.command, "z historii"))
 
-        for natural, bash in self.NATURAL_COMMANDS.items():
-            if not partial or partial.lower() in natural.lower():
-                suggestions.append((natural, bash))
+        partial_lower = partial.casefold()
+        suggestions.extend(
+            (natural, bash)
+            for natural_lower, natural, bash in self._NATURAL_LOWER
+            if partial_lower in natural_lower
+        )
 
         seen = set()
         unique = []
@@ -208,7 +286,7 @@ class Text2Shell:
 
     def get_history(self, n: int = 10) -> List[ShellResult]:
         """Zwraca ostatnie n komend z historii"""
-        return self.history[-n:]
+        return list(self.history)[-n:]
 
     def format_result_for_voice(self, result: ShellResult) -> str:
         if result.success:
@@ -12,6 +12,7 @@ Text2DSL Orchestrator - Główny koordynator warstw
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List, Callable, Union
 from pathlib import Path
+import asyncio
 import threading
 import queue
 import time
@@ -164,6 +165,29 @@ class Text2DSLOrchestrator:
 
         return response
 
+    async def process_async(self, input_text: str) -> ExecutionResponse:
+        """Asynchroniczna wersja process() - wykonanie w puli wątków pętli"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.process, input_text)
+
+    async def probe_layers_async(self) -> Dict[str, Any]:
+        """
+        Równolegle odpytuje warstwy obecne w projekcie
+
+        Returns:
+            Słownik z kluczami "git_status" (gdy projekt ma Git)
+            i "python_version" (gdy projekt jest projektem Python)
+        """
+        project = self.context.project
+        probes = {}
+        if project and project.has_git:
+            probes["git_status"] = self.git.get_status_async()
+        if project and project.has_python:
+            probes["python_version"] = self.python.get_python_version_async()
+
+        results = await asyncio.gather(*probes.values())
+        return dict(zip(probes, results))
+
     def _debug(self, event: str, data: Optional[Dict[str, Any]] = None):
         if not self.config.verbose:
             return
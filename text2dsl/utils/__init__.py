@@ -1,6 +1,20 @@
 """Utilities for text2dsl"""
 
-from .archive import ArchiveManager, ExportResult, create_project_archive
+from typing import TYPE_CHECKING
+
+from .lazy import lazy_attrs
+
+# Archiwizacja (zipfile/tarfile/shutil) ładowana leniwie (PEP 562)
+_LAZY_ATTRS = {
+    "ArchiveManager": ".archive",
+    "ExportResult": ".archive",
+    "create_project_archive": ".archive",
+}
+
+__getattr__, __dir__ = lazy_attrs(globals(), _LAZY_ATTRS)
+
+if TYPE_CHECKING:
+    from .archive import ArchiveManager, ExportResult, create_project_archive
 
 __all__ = [
     "ArchiveManager",
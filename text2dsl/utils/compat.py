@@ -0,0 +1,7 @@
+"""Zgodność między wersjami Pythona"""
+
+import sys
+from typing import Any, Dict
+
+# __slots__ dla dataclass dostępne od Pythona 3.10 - na 3.9 zwykła klasa
+DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
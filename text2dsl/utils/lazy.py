@@ -0,0 +1,38 @@
+"""
+Leniwe atrybuty pakietów (PEP 562)
+
+Użycie w __init__.py pakietu:
+    __getattr__, __dir__ = lazy_attrs(globals(), {"Nazwa": ".moduł"})
+"""
+
+import importlib
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+
+def lazy_attrs(
+    namespace: Dict[str, Any], attrs: Mapping[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Buduje __getattr__ i __dir__ ładujące atrybuty pakietu przy pierwszym użyciu
+
+    Args:
+        namespace: globals() pakietu - tu trafiają załadowane atrybuty
+        attrs: Mapowanie nazwa atrybutu -> moduł (względem pakietu)
+
+    Returns:
+        Para (__getattr__, __dir__) do przypisania w pakiecie
+    """
+    package = namespace["__name__"]
+
+    def __getattr__(name: str) -> Any:
+        module_name = attrs.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(attrs))
+
+    return __getattr__, __dir__
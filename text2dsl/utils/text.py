@@ -0,0 +1,45 @@
+"""
+Dopasowanie tekstu bez wielkości liter z zachowaniem oryginalnej postaci
+
+Słowa kluczowe porównujemy po casefold(), ale argumenty (nazwy plików,
+gałęzi, kontenerów, opisy commitów) muszą pochodzić z tekstu użytkownika -
+"Straße" nie może stać się "strasse".
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List
+
+
+def remove_phrase(text: str, phrase: str) -> str:
+    """
+    Usuwa z tekstu wystąpienia frazy porównując po casefold()
+
+    Args:
+        text: Tekst w oryginalnej postaci
+        phrase: Fraza już po casefold()
+
+    Returns:
+        Tekst bez frazy, reszta w oryginalnej postaci
+    """
+    if not phrase:
+        return text
+
+    # casefold() działa znak po znaku, ale może wydłużyć znak ("ß" -> "ss") -
+    # offsets[i] to pozycja w tekście po casefold() odpowiadająca text[i]
+    folded_chars = [ch.casefold() for ch in text]
+    folded = "".join(folded_chars)
+    offsets: List[int] = [0, *accumulate(map(len, folded_chars))]
+
+    parts = []
+    last = 0
+    pos = folded.find(phrase)
+    while pos != -1:
+        end = pos + len(phrase)
+        # Znak rozcięty przez granicę frazy usuwamy w całości
+        start_index = bisect_right(offsets, pos) - 1
+        parts.append(text[last:start_index])
+        last = bisect_left(offsets, end)
+        pos = folded.find(phrase, offsets[last])
+    parts.append(text[last:])
+    return "".join(parts)